@@ -1,20 +1,13 @@
-import os
-import time
 import random
 import json
-from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from langgraph.graph import StateGraph, START, END
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-# Loading .env
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise SystemExit("ERROR: GOOGLE_API_KEY not set in environment")
-
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=GOOGLE_API_KEY)
+import breaker
+import simtime
+from cassette import default_cassette
+from compactstate import as_dict, state_schema, validated
+from llmclient import complete, parse_json
+from summaryqueue import SummaryQueue
 
 
 # Structured state
@@ -30,6 +23,7 @@ class BakeState(BaseModel):
     reason: str = ""
     peak_oven_c: int = 0
     stages: List[str] = []
+    summary_id: str = ""
 
 # Worker
 
@@ -42,7 +36,7 @@ def bake_worker(state: BakeState) -> BakeState:
         hb = {"stage": stage, "core_temp_c": core_temp, "ok": core_temp >= state.target_temp_c - 15}
         state.heartbeats.append(hb)
         print(f"Heartbeat: {hb}")
-        time.sleep(1)
+        simtime.sleep(1)
 
         if random.random() < 0.08 or not hb["ok"]:
             state.stages = stages[: stages.index(stage) + 1]
@@ -53,6 +47,75 @@ def bake_worker(state: BakeState) -> BakeState:
     state.status = "completed"
     return state
 
+# Log summaries
+
+def parse_summaries(text: str) -> List[str]:
+    return parse_json(text, "[", "]")
+
+
+def summarize_bakes(bakes: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Write log summaries for a batch of finished bakes with one Gemini call.
+
+    With a cassette, each bake's summary is also recorded on its own, so a
+    replay finds it however SummaryQueue happened to batch the bakes.
+    """
+    tape = default_cassette()
+    found = [tape.recall("bake_summary", bake) if tape else None for bake in bakes]
+    todo = [bake for bake, text in zip(bakes, found) if text is None]
+    if not todo:
+        return found
+    prompt = (
+        "For each bake below write a concise 1-2 sentence reason/summary for logs. "
+        "Completed bakes get a success summary, aborted bakes a reason suitable for escalation.\n"
+        f"{json.dumps(todo, indent=2)}\n"
+        "Respond ONLY with a JSON list of strings, one per bake, in the same order."
+    )
+    # an empty list keeps every bake's templated reason
+    fresh = iter(breaker.guard(
+        "bake_summary",
+        lambda: parse_summaries(complete(prompt, site="bake_summary", check=parse_summaries)),
+        lambda: [],
+    ))
+    out = []
+    for bake, text in zip(bakes, found):
+        if text is None:
+            text = next(fresh, None)
+            if tape and isinstance(text, str):
+                tape.remember("bake_summary", bake, text)
+        out.append(text)
+    return out
+
+
+summaries = SummaryQueue(summarize_bakes)
+
+
+def templated_reason(state: BakeState) -> str:
+    """Immediate log reason used until the Gemini summary arrives."""
+    if state.status == "completed":
+        return (f"Bake completed: {state.batch_size} x {state.item} on attempt {state.attempts}, "
+                f"peak oven {state.peak_oven_c}°C.")
+    return (f"Bake aborted: {state.batch_size} x {state.item} failed {state.attempts} attempts, "
+            f"last at {state.current_stage} stage, peak oven {state.peak_oven_c}°C.")
+
+
+def _queue_summary(state: BakeState):
+    state.reason = templated_reason(state)
+    state.summary_id = summaries.submit({
+        "item": state.item,
+        "batch_size": state.batch_size,
+        "status": state.status,
+        "attempts": state.attempts,
+        "peak_oven_c": state.peak_oven_c,
+        "last_stage": state.current_stage,
+    })
+
+
+def summary_status(summary_id: str) -> Dict[str, Any]:
+    """Where a bake's Gemini summary stands; a finished one is handed out here once."""
+    status = summaries.status(summary_id)
+    text = summaries.result(summary_id, timeout=0) if status in ("ready", "failed") else None
+    return {"summary_id": summary_id, "status": status or "unknown", "summary": text}
+
 # Supervisor
 
 def supervisor(state: BakeState) -> BakeState:
@@ -62,44 +125,34 @@ def supervisor(state: BakeState) -> BakeState:
         print(f"\nSupervisor: starting attempt #{state.attempts}")
         state = bake_worker(state)
         if state.status == "completed":
-            prompt = (
-                f"Bake completed successfully.\n"
-                f"Item: {state.item}\nBatch size: {state.batch_size}\n"
-                f"Peak oven temp: {state.peak_oven_c}°C\n"
-                f"Provide a concise 1-2 sentence reason/summary for logs."
-            )
-            resp = llm.invoke(prompt)
-            state.reason = (resp.content or "").strip()
-            print(f"Supervisor: success reason from Gemini: {state.reason}")
+            _queue_summary(state)
+            print(f"Supervisor: success, summary {state.summary_id} queued: {state.reason}")
             return state
         print(f"Supervisor: attempt #{state.attempts} failed, retrying...")
-        time.sleep(1)
+        simtime.sleep(1)
 
-    
-    prompt = (
-        f"Bake aborted after {max_attempts} attempts.\n"
-        f"Item: {state.item}\nBatch size: {state.batch_size}\n"
-        f"Peak oven temp: {state.peak_oven_c}\n"
-        f"Provide a concise reason suitable for escalation (1-2 sentences)."
-    )
-    resp = llm.invoke(prompt)
     state.status = "aborted"
-    state.reason = (resp.content or "").strip()
-    print(f"Supervisor: abort reason from Gemini: {state.reason}")
+    _queue_summary(state)
+    print(f"Supervisor: aborted, summary {state.summary_id} queued: {state.reason}")
     return state
 
 def finalize_success(state: BakeState) -> Dict[str, Any]:
-    return state.dict()
+    return as_dict(state)
 
 def finalize_failure(state: BakeState) -> Dict[str, Any]:
-    return state.dict()
+    return as_dict(state)
 
 # graph construction
 def build_graph():
-    graph = StateGraph(BakeState)
-    graph.add_node("supervisor", supervisor)
-    graph.add_node("finalize_success", finalize_success)
-    graph.add_node("finalize_failure", finalize_failure)
+    from langgraph.graph import StateGraph, START, END
+    from graphmetrics import node_adder
+    from eventlog import logged_graph, logged_nodes
+
+    graph = StateGraph(state_schema(BakeState))
+    add_node = logged_nodes(node_adder(graph, "bake"), "bake")
+    add_node("supervisor", supervisor)
+    add_node("finalize_success", finalize_success)
+    add_node("finalize_failure", finalize_failure)
 
     graph.add_edge(START, "supervisor")
     graph.add_conditional_edges(
@@ -109,7 +162,7 @@ def build_graph():
     )
     graph.add_edge("finalize_success", END)
     graph.add_edge("finalize_failure", END)
-    return graph.compile()
+    return logged_graph(graph.compile(), "bake")
 
 # running the main
 if __name__ == "__main__":
@@ -120,7 +173,13 @@ if __name__ == "__main__":
     app.get_graph().print_ascii()
 
     print("\nRunning baking workflow...\n")
-    result = app.invoke(request)
+    result = app.invoke(validated(BakeState, request))
 
     print("\nFinal aggregated result:")
     print(json.dumps(result, indent=2))
+
+    # upgrade the templated reason once the background summary lands
+    reason = summaries.result(result["summary_id"], timeout=30)
+    if reason:
+        result["reason"] = reason
+        print(f"\nGemini summary: {reason}")
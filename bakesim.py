@@ -0,0 +1,151 @@
+import json
+import time
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+STAGES = ["preheat", "load", "bake", "finish"]
+
+
+# Failure models of the three bake workers
+
+class BakeModel(NamedTuple):
+    """Per-stage failure model of one bake worker.
+
+    Core temperature is drawn uniformly from
+    [target + low_offset_c, target + high_offset_c]; a stage fails when it
+    drops below target - tolerance_c or on a random fault.
+    """
+    low_offset_c: int
+    high_offset_c: int
+    tolerance_c: int
+    fault_rate: float
+
+
+MODELS = {
+    # baker.bake_worker: randint(t-20, t+5), ok if >= t-15, 8% random failure
+    "baker": BakeModel(-20, 5, 15, 0.08),
+    # taskfourf.bake_batch: randint(t-10, t+5), fails below t-5, 20% heartbeat loss
+    "taskfourf": BakeModel(-10, 5, 5, 0.20),
+    # task4.bake_batch: randint(180, 240), fails below 200 (fixed range, shown at 230C)
+    "task4": BakeModel(-50, 10, 30, 0.0),
+}
+
+
+# Simulation
+
+def _draw_attempts(rng: np.random.Generator, model: BakeModel, n: int, max_retries: int):
+    """Draw temperature offsets and fault flags for n bakes of max_retries attempts."""
+    shape = (n, max_retries, len(STAGES))
+    offsets = rng.integers(model.low_offset_c, model.high_offset_c + 1, size=shape, dtype=np.int16)
+    faults = rng.random(size=shape, dtype=np.float32) < model.fault_rate
+    return offsets, faults
+
+
+def _first_success(offsets: np.ndarray, faults: np.ndarray, tolerance_c: int) -> np.ndarray:
+    """Index of the first successful attempt per bake, or -1 if every attempt failed."""
+    attempt_ok = ((offsets >= -tolerance_c) & ~faults).all(axis=2)
+    first = attempt_ok.argmax(axis=1)
+    return np.where(attempt_ok.any(axis=1), first, -1)
+
+
+def _failed_stage(offsets: np.ndarray, faults: np.ndarray, tolerance_c: int) -> np.ndarray:
+    """Stage index each attempt died in (len(STAGES) for completed attempts)."""
+    stage_bad = (offsets < -tolerance_c) | faults
+    return np.where(stage_bad.any(axis=2), stage_bad.argmax(axis=2), len(STAGES))
+
+
+def simulate(
+    model: BakeModel = MODELS["baker"],
+    n_bakes: int = 1_000_000,
+    max_retries: int = 3,
+    tolerance_c: Optional[int] = None,
+    seed: int = 42,
+    chunk_size: int = 250_000,
+) -> Dict[str, Any]:
+    """Run n_bakes supervised bakes without sleeps and summarize the outcome.
+
+    Draws are made in chunks of NumPy arrays so millions of attempts fit in
+    a few seconds; the same seed always gives the same report.
+    """
+    tolerance_c = model.tolerance_c if tolerance_c is None else tolerance_c
+    rng = np.random.default_rng(seed)
+
+    attempts_hist = np.zeros(max_retries + 1, dtype=np.int64)  # slot 0 = aborted
+    stage_fail_hist = np.zeros(len(STAGES) + 1, dtype=np.int64)
+    total_attempts = 0
+
+    done = 0
+    while done < n_bakes:
+        n = min(chunk_size, n_bakes - done)
+        offsets, faults = _draw_attempts(rng, model, n, max_retries)
+        first = _first_success(offsets, faults, tolerance_c)
+        attempts_hist += np.bincount(first + 1, minlength=max_retries + 1)
+
+        # only attempts the supervisor actually ran count towards stage failures
+        used = np.where(first >= 0, first + 1, max_retries)
+        ran = np.arange(max_retries)[None, :] < used[:, None]
+        stages = _failed_stage(offsets, faults, tolerance_c)[ran]
+        stage_fail_hist += np.bincount(stages, minlength=len(STAGES) + 1)
+        total_attempts += int(used.sum())
+        done += n
+
+    completed = int(attempts_hist[1:].sum())
+    return {
+        "n_bakes": n_bakes,
+        "max_retries": max_retries,
+        "tolerance_c": tolerance_c,
+        "success_rate": completed / n_bakes,
+        "abort_rate": int(attempts_hist[0]) / n_bakes,
+        "mean_attempts": total_attempts / n_bakes,
+        "attempts": {str(i): int(attempts_hist[i]) for i in range(1, max_retries + 1)},
+        "per_attempt_success": completed / total_attempts if total_attempts else 0.0,
+        "failed_stage": {stage: int(stage_fail_hist[i]) for i, stage in enumerate(STAGES)},
+    }
+
+
+def sweep(
+    model: BakeModel = MODELS["baker"],
+    max_retries: Tuple[int, ...] = (1, 2, 3, 4, 5),
+    tolerances_c: Tuple[int, ...] = (5, 10, 15, 20),
+    n_bakes: int = 200_000,
+    seed: int = 42,
+) -> List[Dict[str, Any]]:
+    """Success/abort rates over a grid of max_retries and tolerance values.
+
+    One set of draws with the largest retry budget is shared by the whole
+    grid, so rows differ only by policy, not by sampling noise.
+    """
+    rng = np.random.default_rng(seed)
+    offsets, faults = _draw_attempts(rng, model, n_bakes, max(max_retries))
+
+    rows = []
+    for tol in tolerances_c:
+        first = _first_success(offsets, faults, tol)
+        for r in max_retries:
+            ok = (first >= 0) & (first < r)
+            used = np.where(ok, first + 1, r)
+            rows.append({
+                "tolerance_c": tol,
+                "max_retries": r,
+                "success_rate": float(ok.mean()),
+                "abort_rate": float(1 - ok.mean()),
+                "mean_attempts": float(used.mean()),
+            })
+    return rows
+
+
+# running the main
+if __name__ == "__main__":
+    for name, model in MODELS.items():
+        start = time.perf_counter()
+        report = simulate(model, n_bakes=1_000_000)
+        elapsed = time.perf_counter() - start
+        print(f"\n{name}: {report['n_bakes']:,} bakes in {elapsed:.2f}s")
+        print(json.dumps(report, indent=2))
+
+    print("\nbaker retry/tolerance sweep:")
+    print(f"{'tol_c':>6} {'retries':>8} {'success':>9} {'abort':>9} {'attempts':>9}")
+    for row in sweep(MODELS["baker"]):
+        print(f"{row['tolerance_c']:>6} {row['max_retries']:>8} {row['success_rate']:>9.4f} "
+              f"{row['abort_rate']:>9.4f} {row['mean_attempts']:>9.3f}")
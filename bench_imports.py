@@ -0,0 +1,50 @@
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+MODULES = [
+    "baker", "orchas", "orderrouter", "dinnersanpshot",
+    "taskonep", "tasktwoo", "taskthreer", "taskfourf",
+]
+
+_IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+import llmclient
+llmclient.get_llm()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+
+# Cold-start benchmark
+
+def time_module(module: str, runs: int = 5) -> Dict[str, float]:
+    """Median cold import time and first-client creation time, each in a fresh interpreter."""
+    env = {**os.environ, "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY") or "bench-placeholder"}
+    here = os.path.dirname(os.path.abspath(__file__))
+    imports, clients = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SNIPPET.format(module=module)],
+            cwd=here, env=env, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        imports.append(float(out[0]))
+        clients.append(float(out[1]))
+    return {"import_ms": statistics.median(imports) * 1000, "first_llm_ms": statistics.median(clients) * 1000}
+
+
+def run(modules: List[str] = MODULES, runs: int = 5) -> Dict[str, Dict[str, float]]:
+    return {module: time_module(module, runs) for module in modules}
+
+
+# running the main
+if __name__ == "__main__":
+    modules = sys.argv[1:] or MODULES
+    print(f"{'module':<16} {'import ms':>10} {'first llm ms':>13}")
+    for module, result in run(modules).items():
+        print(f"{module:<16} {result['import_ms']:>10.1f} {result['first_llm_ms']:>13.1f}")
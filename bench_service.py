@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# the service runs against the offline stand-in LLM, uncached
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_CACHE", "0")
+os.environ.setdefault("SNAPSHOT_STORE", "0")
+
+from graphmetrics import Histogram
+from loadgen import synth_request
+
+DEFAULT_MIX = {"orders": 0.6, "snapshot": 0.3, "catering": 0.1}
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# Keep-alive client
+
+class Connection:
+    """One persistent HTTP/1.1 connection; requests on it go one at a time."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "Connection":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+        if headers.get("transfer-encoding") == "chunked":
+            data = b""
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                data += chunk[:-2]
+            return status, [json.loads(line) for line in data.splitlines()]
+        return status, json.loads(await self.reader.readexactly(int(headers.get("content-length", "0"))))
+
+    def close(self):
+        self.writer.close()
+
+
+async def _one(conn: Connection, kind: str, rng: random.Random) -> int:
+    if kind == "orders":
+        return (await conn.request("POST", "/orders", synth_request("order", rng)))[0]
+    if kind == "snapshot":
+        return (await conn.request("POST", "/snapshot", synth_request("snapshot", rng)))[0]
+    # a catering quote and its approval, as a restaurant system would send them
+    status, ticket = await conn.request("POST", "/catering", synth_request("catering", rng))
+    if ticket.get("status") != "pending_approval":
+        return status
+    return (await conn.request("POST", f"/catering/{ticket['id']}/approval", {"approve": True}))[0]
+
+
+async def run_clients(host: str, port: int, n: int, concurrency: int, mix: Dict[str, float],
+                      seed: int = 0) -> Dict[str, Any]:
+    """n requests from concurrency keep-alive connections, as fast as the service answers."""
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), list(mix.values()), k=n)
+    hists: Dict[str, Histogram] = {}
+    errors: Dict[str, int] = {}
+    conns = [await Connection.open(host, port) for _ in range(concurrency)]
+    queue: asyncio.Queue = asyncio.Queue()
+    for kind in kinds:
+        queue.put_nowait(kind)
+
+    async def worker(conn: Connection):
+        local = random.Random(rng.random())
+        while not queue.empty():
+            kind = queue.get_nowait()
+            start = time.perf_counter()
+            status = await _one(conn, kind, local)
+            hists.setdefault(kind, Histogram()).record(int((time.perf_counter() - start) * 1e6))
+            if status >= 400:
+                errors[kind] = errors.get(kind, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(c) for c in conns))
+    elapsed = time.perf_counter() - start
+    for c in conns:
+        c.close()
+    return {
+        "requests": n,
+        "concurrency": concurrency,
+        "requests_per_s": n / elapsed,
+        "endpoints": {k: {"count": h.count, "p50_ms": h.quantile(0.5) / 1000, "p99_ms": h.quantile(0.99) / 1000,
+                          "errors": errors.get(k, 0)} for k, h in sorted(hists.items())},
+    }
+
+
+# Baselines
+
+def cold_process_ms(runs: int = 3) -> float:
+    """One order routed by starting a fresh interpreter, as running the script per request would."""
+    code = ("import orderrouter; orderrouter.build_order_graph().invoke("
+            "{'order_type': 'delivery', 'items': ['tiramisu'], 'address': '1 King St W', 'requested_time': 'ASAP'})")
+    total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+        total += time.perf_counter() - start
+    return total / runs * 1000
+
+
+def start_service(shards: int) -> Tuple[subprocess.Popen, int]:
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, "service.py"), "--port", "0", "--quiet", "--fast",
+                             "--shards", str(shards)], cwd=HERE, stderr=subprocess.PIPE, text=True)
+    line = proc.stderr.readline()
+    if "listening on" not in line:
+        proc.kill()
+        raise RuntimeError(f"service did not start: {line}")
+    return proc, int(line.rsplit(":", 1)[1])
+
+
+# running the main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of the HTTP service against the stand-in LLM")
+    parser.add_argument("-n", type=int, default=3000, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help='e.g. \'{"orders": 1}\'')
+    parser.add_argument("--shards", type=int, default=0, help="run the service with a shard pool")
+    args = parser.parse_args()
+
+    proc, port = start_service(args.shards)
+    try:
+        asyncio.run(run_clients("127.0.0.1", port, 100, 4, args.mix, seed=1))  # warm up
+        levels = [asyncio.run(run_clients("127.0.0.1", port, args.n, c, args.mix)) for c in args.concurrency]
+    finally:
+        proc.terminate()
+        proc.wait()
+    cold = cold_process_ms()
+    print(json.dumps({"service": levels, "cold_process_ms_per_order": cold}, indent=2))
+    best = max(levels, key=lambda r: r["requests_per_s"])
+    print(f"service: {best['requests_per_s']:,.0f} req/s at concurrency {best['concurrency']}; "
+          f"process per request: {1000 / cold:.1f} req/s ({cold:.0f} ms each)")
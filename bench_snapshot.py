@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+from unittest import mock
+
+# offline, uncached LLM with no simulated latency: only framework cost is left
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_CACHE", "0")
+os.environ.setdefault("SNAPSHOT_STORE", "0")
+
+from bench_variants import stubbed
+
+CONCURRENCY = (1, 64, 512)
+
+
+# Snapshot implementations
+
+def _runnable_parallel() -> Callable[[str], Awaitable[Any]]:
+    """The previous taskonep shape: sync tools wrapped in RunnableParallel lambdas."""
+    from langchain_core.runnables import RunnableParallel
+    from langchain_core.tools import tool
+    from taskonep import overall_busyness
+
+    @tool
+    def check_inventory(service_area: str):
+        """Check stock for key items: steak, pasta, lettuce"""
+        return {"inventory": {"steak": "low", "pasta": "ok", "lettuce": "ok"}}
+
+    @tool
+    def check_floor(service_area: str):
+        """Check open tables and waitlist length"""
+        return {"floor": {"open_tables": 4, "waitlist": 12}}
+
+    @tool
+    def check_delivery(service_area: str):
+        """Check active drivers and average ETA"""
+        return {"delivery": {"drivers_on_duty": 5, "avg_eta_min": 28}}
+
+    async def snapshot(service_area: str):
+        parallel = RunnableParallel(
+            inventory=lambda _: check_inventory.invoke(service_area),
+            floor=lambda _: check_floor.invoke(service_area),
+            delivery=lambda _: check_delivery.invoke(service_area),
+        )
+        results = await parallel.ainvoke({})
+        results["overall"] = await overall_busyness(results)
+        return results
+
+    return snapshot
+
+
+def _implementations() -> Dict[str, Callable[[str], Awaitable[Any]]]:
+    import taskone
+    import taskonep
+
+    return {
+        "taskone": lambda area: taskone.dinner_rush_snapshot({"service_area": area}),
+        "taskonep": taskonep.dinner_rush_snapshot,
+        "runnable_parallel": _runnable_parallel(),
+    }
+
+
+# Measurement
+
+async def _run(snapshot: Callable[[str], Awaitable[Any]], concurrency: int, n: int) -> float:
+    for _ in range(20):
+        await snapshot("downtown")
+    start = time.perf_counter()
+    for _ in range(n // concurrency):
+        await asyncio.gather(*(snapshot(f"area-{i}") for i in range(concurrency)))
+    return (time.perf_counter() - start) / (n // concurrency * concurrency)
+
+
+def measure(snapshot: Callable[[str], Awaitable[Any]], n: int) -> Dict[str, Any]:
+    """Per-snapshot cost at each concurrency, plus executor hops and threads used."""
+    hops = 0
+    run_in_executor = asyncio.BaseEventLoop.run_in_executor
+
+    def counting(loop, executor, fn, *args):
+        nonlocal hops
+        hops += 1
+        return run_in_executor(loop, executor, fn, *args)
+
+    threads_before = threading.active_count()
+    out: Dict[str, Any] = {"us_per_snapshot": {}}
+    with mock.patch.object(asyncio.BaseEventLoop, "run_in_executor", counting):
+        for c in CONCURRENCY:
+            out["us_per_snapshot"][str(c)] = asyncio.run(_run(snapshot, c, max(n, c))) * 1e6
+        hops = 0
+        asyncio.run(snapshot("downtown"))
+    out["executor_hops_per_snapshot"] = hops
+    out["threads_added"] = threading.active_count() - threads_before
+    return out
+
+
+# running the main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-snapshot framework overhead: taskonep vs taskone")
+    parser.add_argument("-n", type=int, default=2048, help="snapshots per concurrency level")
+    args = parser.parse_args()
+
+    with stubbed():
+        results = {name: measure(fn, args.n) for name, fn in _implementations().items()}
+    base = results["taskone"]["us_per_snapshot"]
+    for name, r in results.items():
+        r["overhead_vs_taskone_us"] = {c: us - base[c] for c, us in r["us_per_snapshot"].items()}
+    print(json.dumps(results, indent=2))
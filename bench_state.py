@@ -0,0 +1,146 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+# offline, uncached LLM with no simulated latency: only framework cost is left
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_CACHE", "0")
+os.environ.setdefault("SNAPSHOT_STORE", "0")
+
+import graphmetrics
+from bench_variants import BAKE, SNAPSHOT, stubbed
+
+BACKENDS = ("pydantic", "compact")
+
+
+# Per-node transitions
+
+class TransitionProbe:
+    """graphmetrics probe timing the gap before each node starts.
+
+    The gap runs from the previous node's exit (or the start of the run) to
+    the node's enter: LangGraph applying the last update to its channels and
+    building the node's state object. Allocated blocks are the interpreter's
+    count of live blocks across the same gap; with tracemalloc on, the peak
+    bytes traced in it are added too.
+    """
+
+    def __init__(self, traced: bool = False):
+        self.traced = traced
+        self.stats: Dict[str, List[float]] = {}  # node -> [count, seconds, blocks, peak bytes]
+        self._lock = threading.Lock()
+        self._mark = (0.0, 0, 0)
+
+    def _now(self) -> Tuple[float, int, int]:
+        current = tracemalloc.get_traced_memory()[0] if self.traced else 0
+        return time.perf_counter(), sys.getallocatedblocks(), current
+
+    def start_run(self):
+        if self.traced:
+            tracemalloc.reset_peak()
+        self._mark = self._now()
+
+    def __call__(self, workflow: str, node: str, phase: str):
+        now = self._now()
+        with self._lock:
+            if phase == "exit":
+                if self.traced:
+                    tracemalloc.reset_peak()
+                self._mark = self._now()
+                return
+            seconds, blocks, current = self._mark
+            peak = tracemalloc.get_traced_memory()[1] - current if self.traced else 0
+            acc = self.stats.setdefault(node, [0, 0.0, 0, 0])
+            acc[0] += 1
+            acc[1] += now[0] - seconds
+            acc[2] += now[1] - blocks
+            acc[3] += peak
+
+
+def _graph_runner(workflow: str) -> Tuple[Callable[[], Any], str]:
+    """The workflow's compiled graph as a callable, and the state type its nodes receive."""
+    from compactstate import validated
+
+    if workflow == "bake":
+        import baker
+        app = baker.build_graph()
+        run = lambda: app.invoke(validated(baker.BakeState, BAKE))
+    else:
+        import dinnersanpshot
+        app = dinnersanpshot.build_dinner_graph()
+        run = lambda: app.invoke(validated(dinnersanpshot.RestaurantState, SNAPSHOT))
+    inputs = {node.input_schema.__name__ for node in app.builder.nodes.values()}
+    return run, ",".join(sorted(inputs))
+
+
+def _probed(run: Callable[[], Any], n: int, traced: bool = False) -> TransitionProbe:
+    probe = TransitionProbe(traced)
+    graphmetrics.set_probe(probe)
+    try:
+        for _ in range(n):
+            probe.start_run()
+            run()
+    finally:
+        graphmetrics.set_probe(None)
+    return probe
+
+
+def measure_graphs(n: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Per-node transition cost and allocations for each workflow under both state backends."""
+    graphmetrics.enable()
+    out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for backend in BACKENDS:
+        os.environ["GRAPH_STATE"] = backend
+        for module in ("baker", "dinnersanpshot"):
+            if module in sys.modules:
+                importlib.reload(sys.modules[module])
+        for workflow in ("bake", "dinner"):
+            run, node_state = _graph_runner(workflow)
+            with stubbed():
+                _probed(run, 20)
+                start = time.perf_counter()
+                timed = _probed(run, n)
+                elapsed = time.perf_counter() - start
+                tracemalloc.start()
+                try:
+                    traced = _probed(run, max(1, n // 10), traced=True)
+                finally:
+                    tracemalloc.stop()
+            nodes = {}
+            for node, (count, seconds, blocks, _) in timed.stats.items():
+                peak = traced.stats.get(node, [1, 0.0, 0, 0])
+                nodes[node] = {
+                    "count": count,
+                    "us_per_transition": seconds / count * 1e6,
+                    "blocks_per_transition": blocks / count,
+                    "peak_bytes_per_transition": peak[3] / peak[0],
+                }
+            transitions = sum(s[0] for s in timed.stats.values())
+            out.setdefault(workflow, {})[backend] = {
+                "node_state": node_state,
+                "us_per_run": elapsed / n * 1e6,
+                "us_per_transition": sum(s[1] for s in timed.stats.values()) / transitions * 1e6,
+                "nodes": nodes,
+            }
+    return out
+
+
+def _speedups(results: Dict[str, Dict[str, Dict[str, Any]]], key: str) -> Dict[str, float]:
+    return {name: r["pydantic"][key] / r["compact"][key] for name, r in results.items() if r["compact"][key]}
+
+
+# running the main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="State backend cost: pydantic models vs slotted dataclasses")
+    parser.add_argument("--runs", type=int, default=300, help="graph invocations per measurement")
+    args = parser.parse_args()
+
+    graphs = measure_graphs(args.runs)
+    print(json.dumps({"graphs": graphs, "transition_speedup": _speedups(graphs, "us_per_transition"),
+                      "graph_speedup": _speedups(graphs, "us_per_run")}, indent=2))
@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import builtins
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from unittest import mock
+
+# every LLM call goes to the offline fake model, never to the cache or network
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_CACHE", "0")
+os.environ.setdefault("SNAPSHOT_STORE", "0")
+
+import console
+import simtime
+
+BASELINE_PATH = "bench_baselines.json"
+CONCURRENCY = (1, 4, 16)
+
+SNAPSHOT = {"service_area": "downtown"}
+CATERING = {"event_date": "2025-11-12", "headcount": 80, "menu": ["grilled chicken", "pasta primavera", "salad"]}
+ORDER = {"order_type": "delivery", "items": ["margherita pizza", "caesar salad"], "address": "55 King St W", "requested_time": "ASAP"}
+BAKE = {"item": "sourdough", "target_temp_c": 230, "batch_size": 12}
+
+
+class Variant(NamedTuple):
+    workflow: str
+    name: str
+    factory: Callable[[], Callable]  # builds the callable once (graph compile etc.)
+    is_async: bool = False
+
+
+# Variants: plain Python vs LangGraph/tool versions of each workflow
+
+def _variants() -> List[Variant]:
+    def taskone():
+        import taskone
+        return lambda: taskone.dinner_rush_snapshot(SNAPSHOT)
+
+    def dinner_graph():
+        import dinnersanpshot
+        from compactstate import validated
+        app = dinnersanpshot.build_dinner_graph()
+        return lambda: app.invoke(validated(dinnersanpshot.RestaurantState, SNAPSHOT))
+
+    def taskonep():
+        import taskonep
+        return lambda: taskonep.dinner_rush_snapshot(SNAPSHOT["service_area"])
+
+    def task2():
+        import task2
+        return lambda: task2.catering_orchestrator(dict(CATERING))
+
+    def orchas_graph():
+        import orchas
+        app = orchas.build_graph()
+        return lambda: app.invoke(dict(CATERING))
+
+    def tasktwoo():
+        import tasktwoo
+        return lambda: tasktwoo.run_catering_orchestrator_manual(CATERING)
+
+    def tasktwoo_trusted():
+        import tasktwoo
+        return lambda: tasktwoo.run_catering_orchestrator_manual(CATERING, trusted=True)
+
+    def task3():
+        import task3
+        return lambda: task3.router(ORDER)
+
+    def order_graph():
+        import orderrouter
+        app = orderrouter.build_order_graph()
+        return lambda: app.invoke(dict(ORDER))
+
+    def taskthreer():
+        import taskthreer
+        return lambda: taskthreer.route_order(ORDER)
+
+    def task4():
+        import task4
+        return lambda: task4.supervisor(BAKE)
+
+    def bake_graph():
+        import baker
+        from compactstate import validated
+        app = baker.build_graph()
+        return lambda: app.invoke(validated(baker.BakeState, BAKE))
+
+    def taskfourf():
+        import taskfourf
+        return lambda: taskfourf.supervise_bake.invoke(input=BAKE)
+
+    return [
+        Variant("snapshot", "taskone", taskone, is_async=True),
+        Variant("snapshot", "dinnersanpshot", dinner_graph),
+        Variant("snapshot", "taskonep", taskonep, is_async=True),
+        Variant("catering", "task2", task2),
+        Variant("catering", "orchas", orchas_graph),
+        Variant("catering", "tasktwoo", tasktwoo),
+        Variant("catering", "tasktwoo_trusted", tasktwoo_trusted),
+        Variant("router", "task3", task3),
+        Variant("router", "orderrouter", order_graph),
+        Variant("router", "taskthreer", taskthreer),
+        Variant("bake", "task4", task4, is_async=True),
+        Variant("bake", "baker", bake_graph),
+        Variant("bake", "taskfourf", taskfourf),
+    ]
+
+
+# No simulated sleeps, no console output, and a manager who always says yes
+
+@contextmanager
+def stubbed():
+    previous = os.environ.get("SIM_SLEEP_SCALE")
+    simtime.set_scale(0)
+    try:
+        # task2 and tasktwoo read the approval straight from input()
+        with mock.patch.object(builtins, "input", lambda prompt="": "yes"), console.quiet():
+            yield
+    finally:
+        if previous is None:
+            del os.environ["SIM_SLEEP_SCALE"]
+        else:
+            os.environ["SIM_SLEEP_SCALE"] = previous
+
+
+# Measurements
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure_latency(call: Callable, is_async: bool, n: int) -> Dict[str, float]:
+    """Sequential per-invocation latency in microseconds."""
+    samples = []
+    if is_async:
+        async def loop():
+            for _ in range(n):
+                start = time.perf_counter()
+                await call()
+                samples.append(time.perf_counter() - start)
+        asyncio.run(loop())
+    else:
+        for _ in range(n):
+            start = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - start)
+    us = [s * 1e6 for s in samples]
+    return {"p50_us": statistics.median(us), "p99_us": _percentile(us, 0.99), "mean_us": statistics.fmean(us)}
+
+
+def measure_throughput(call: Callable, is_async: bool, concurrency: int, n: int) -> float:
+    """Completed invocations per second with `concurrency` in flight."""
+    start = time.perf_counter()
+    if is_async:
+        async def run_all():
+            sem = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with sem:
+                    await call()
+            await asyncio.gather(*(one() for _ in range(n)))
+        asyncio.run(run_all())
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda _: call(), range(n)))
+    return n / (time.perf_counter() - start)
+
+
+def measure_memory(call: Callable, is_async: bool) -> int:
+    """Peak bytes allocated by one invocation."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    if is_async:
+        asyncio.run(call())
+    else:
+        call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - base
+
+
+def run_variant(variant: Variant, n: int) -> Dict[str, Any]:
+    random.seed(0)
+    try:
+        call = variant.factory()
+        measure_latency(call, variant.is_async, max(5, n // 10))  # warm-up
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {
+        **measure_latency(call, variant.is_async, n),
+        "throughput_per_s": {str(c): measure_throughput(call, variant.is_async, c, n) for c in CONCURRENCY},
+        "peak_bytes": measure_memory(call, variant.is_async),
+    }
+
+
+def run(n: int = 200, only: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    with stubbed():
+        for variant in _variants():
+            if only and variant.workflow not in only:
+                continue
+            results.setdefault(variant.workflow, {})[variant.name] = run_variant(variant, n)
+    return results
+
+
+# Baselines
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Regressions where p50 latency or peak memory grew beyond tolerance."""
+    failures = []
+    for workflow, variants in results.items():
+        for name, cur in variants.items():
+            old = baseline.get(workflow, {}).get(name)
+            if not old or "error" in old:
+                continue
+            if "error" in cur:
+                failures.append(f"{workflow}/{name}: now fails ({cur['error']})")
+                continue
+            for key in ("p50_us", "peak_bytes"):
+                if cur[key] > old[key] * (1 + tolerance):
+                    failures.append(f"{workflow}/{name}: {key} {old[key]:.0f} -> {cur[key]:.0f}")
+    return failures
+
+
+def print_table(results: Dict[str, Dict[str, Any]]):
+    header = f"{'workflow':<10} {'variant':<15} {'p50 us':>10} {'p99 us':>10} " + \
+             " ".join(f"{'c=' + str(c) + ' /s':>11}" for c in CONCURRENCY) + f" {'peak KiB':>9}"
+    sys.stdout.write(header + "\n")
+    for workflow, variants in results.items():
+        for name, r in variants.items():
+            if "error" in r:
+                sys.stdout.write(f"{workflow:<10} {name:<15} skipped: {r['error']}\n")
+                continue
+            tput = " ".join(f"{r['throughput_per_s'][str(c)]:>11.0f}" for c in CONCURRENCY)
+            sys.stdout.write(f"{workflow:<10} {name:<15} {r['p50_us']:>10.1f} {r['p99_us']:>10.1f} "
+                             f"{tput} {r['peak_bytes'] / 1024:>9.1f}\n")
+
+
+# running the main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plain Python vs LangGraph workflow benchmarks")
+    parser.add_argument("-n", type=int, default=200, help="invocations per measurement")
+    parser.add_argument("--only", nargs="*", help="workflows to run (snapshot catering router bake)")
+    parser.add_argument("--save", action="store_true", help=f"write results to {BASELINE_PATH}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    args = parser.parse_args()
+
+    results = run(args.n, args.only)
+    print_table(results)
+
+    if args.save:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        if failures:
+            print("\nREGRESSIONS vs baseline:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("\nNo regressions vs baseline.")
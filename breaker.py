@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+# Circuit breaker
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one LLM call site.
+
+    Outcomes from the last window_s seconds are kept; with at least
+    min_calls of them, a failure rate (errors plus calls slower than
+    slow_call_s) above failure_threshold opens the circuit. While open
+    every call goes straight to its fallback. After open_s one probe is let
+    through: success closes the circuit, failure reopens it for twice as
+    long (capped at max_open_s), so a provider that stays down is probed
+    less and less often.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: float = 0.5,
+        min_calls: int = 10,
+        window_s: float = 30.0,
+        slow_call_s: float = 10.0,
+        open_s: float = 5.0,
+        max_open_s: float = 60.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window_s = window_s
+        self.slow_call_s = slow_call_s
+        self.base_open_s = open_s
+        self.open_s = open_s
+        self.max_open_s = max_open_s
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._probing = False
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.failures = 0
+        self.fallbacks = 0
+        self.short_circuited = 0
+        self.trips = 0
+
+    def _failure_rate(self, now: float) -> float:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_s:
+            self._outcomes.popleft()
+        if len(self._outcomes) < self.min_calls:
+            return 0.0
+        return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def _allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_s:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def _record(self, ok: bool):
+        now = time.monotonic()
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.failures += 1
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self.state = CLOSED
+                    self.open_s = self.base_open_s
+                    self._outcomes.clear()
+                else:
+                    self.state = OPEN
+                    self.opened_at = now
+                    self.open_s = min(self.open_s * 2, self.max_open_s)
+                    self.trips += 1
+                return
+            self._outcomes.append((now, ok))
+            if self.state == CLOSED and self._failure_rate(now) > self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = now
+                self.trips += 1
+                print(f"Circuit breaker: {self.name} opened ({self.failure_threshold:.0%} failure rate exceeded)")
+
+    def call(self, fn: Callable[[], Any], fallback: Callable[[], Any]) -> Any:
+        """fn() while the circuit is closed, fallback() when it is open or fn fails."""
+        if not self._allow():
+            self.short_circuited += 1
+            self.fallbacks += 1
+            return fallback()
+        start = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self._record(False)
+            self.fallbacks += 1
+            print(f"Circuit breaker: {self.name} call failed ({type(e).__name__}: {e}), using fallback")
+            return fallback()
+        except BaseException:
+            self._record(False)  # cancelled or interrupted: a half-open probe must still end
+            raise
+        self._record(time.monotonic() - start <= self.slow_call_s)
+        return result
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], fallback: Callable[[], Any]) -> Any:
+        """call() for coroutines; the fallback stays a plain function."""
+        if not self._allow():
+            self.short_circuited += 1
+            self.fallbacks += 1
+            return fallback()
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except Exception as e:
+            self._record(False)
+            self.fallbacks += 1
+            print(f"Circuit breaker: {self.name} call failed ({type(e).__name__}: {e}), using fallback")
+            return fallback()
+        except BaseException:
+            self._record(False)  # cancelled or interrupted: a half-open probe must still end
+            raise
+        self._record(time.monotonic() - start <= self.slow_call_s)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            rate = self._failure_rate(time.monotonic())
+        return {
+            "state": self.state,
+            "failure_rate": rate,
+            "calls": self.calls,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "short_circuited": self.short_circuited,
+            "trips": self.trips,
+            "open_s": self.open_s,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get(name: str, **kwargs) -> CircuitBreaker:
+    """Process-wide breaker for a call site, created on first use."""
+    b = _breakers.get(name)
+    if b is None:
+        with _registry_lock:
+            b = _breakers.setdefault(name, CircuitBreaker(name, **kwargs))
+    return b
+
+
+def guard(name: str, fn: Callable[[], Any], fallback: Callable[[], Any]) -> Any:
+    return get(name).call(fn, fallback)
+
+
+async def aguard(name: str, fn: Callable[[], Awaitable[Any]], fallback: Callable[[], Any]) -> Any:
+    return await get(name).acall(fn, fallback)
+
+
+def after_fork_in_child():
+    """Unheld locks: another parent thread may have held one at fork time."""
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    for b in _breakers.values():
+        b._lock = threading.Lock()
+
+
+# Export
+
+def metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: b.metrics() for name, b in sorted(_breakers.items())}
+
+
+def export_prometheus(prefix: str = "llm_breaker") -> str:
+    states = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+    lines = [f"# TYPE {prefix}_state gauge"]
+    snapshot = metrics()
+    for name, m in snapshot.items():
+        lines.append(f'{prefix}_state{{site="{name}"}} {states[m["state"]]}')
+    for key in ("calls", "failures", "fallbacks", "short_circuited", "trips"):
+        lines.append(f"# TYPE {prefix}_{key}_total counter")
+        for name, m in snapshot.items():
+            lines.append(f'{prefix}_{key}_total{{site="{name}"}} {m[key]}')
+    return "\n".join(lines) + "\n"
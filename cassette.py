@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from llmcache import cache_key
+
+RECORD = "record"  # always call upstream and append the answer
+REPLAY = "replay"  # answer only from the tape; a miss raises CassetteMiss
+AUTO = "auto"      # replay what's there, record what isn't
+MODES = (RECORD, REPLAY, AUTO)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    site TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    params TEXT NOT NULL,
+    response TEXT NOT NULL,
+    latency_s REAL NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (key, seq)
+);
+CREATE INDEX IF NOT EXISTS interactions_site ON interactions(site);
+"""
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+# Cassette
+
+
+class Cassette:
+    """Recorded LLM request/response pairs in a SQLite file, indexed by request.
+
+    A prompt recorded several times keeps every answer; replay hands them
+    out in recorded order and wraps around, so repeated calls see the same
+    sequence on every run. latency_scale > 0 sleeps for the recorded
+    upstream latency times that factor before answering.
+
+    Replay matches on the exact prompt, so it is only as deterministic as
+    the prompt. route_order, manager_gate, busyness and snapshot.* build
+    theirs from the request alone. bake_summary batches whatever bakes
+    SummaryQueue collected together, so its batch prompts rarely repeat;
+    its answers are also kept per bake (recall/remember), which replays
+    regardless of how the bakes were batched.
+    """
+
+    def __init__(self, path: str, mode: str = AUTO, latency_scale: float = 0.0):
+        if mode not in MODES:
+            raise ValueError(f"cassette mode must be one of {MODES}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._tape: Dict[str, list] = {}
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.recorded: Dict[str, int] = defaultdict(int)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _entries(self, key: str) -> list:
+        entries = self._tape.get(key)
+        if entries is None:
+            entries = self._conn().execute(
+                "SELECT response, latency_s FROM interactions WHERE key = ? ORDER BY seq", (key,)
+            ).fetchall()
+            if entries:  # a miss is looked up again: another process may record it meanwhile
+                self._tape[key] = entries
+        return entries
+
+    def _next(self, key: str, site: str) -> Optional[tuple]:
+        if self.mode == RECORD:
+            return None
+        with self._lock:
+            entries = self._entries(key)
+            if not entries:
+                self.misses[site] += 1
+                return None
+            i = self._cursor[key]
+            self._cursor[key] = i + 1
+            self.hits[site] += 1
+            return entries[i % len(entries)]
+
+    def _store(self, key: str, model: str, prompt: str, params: Dict[str, Any], site: str,
+               response: str, latency_s: float):
+        with self._lock:
+            conn = self._conn()
+            conn.execute(
+                "INSERT INTO interactions VALUES (?, "
+                "(SELECT COALESCE(MAX(seq), -1) + 1 FROM interactions WHERE key = ?), ?, ?, ?, ?, ?, ?, ?)",
+                (key, key, site, model, prompt, json.dumps(params, sort_keys=True, default=str),
+                 response, latency_s, time.time()),
+            )
+            self._tape.setdefault(key, []).append((response, latency_s))
+            self.recorded[site] += 1
+
+    def _miss(self, site: str):
+        if self.mode == REPLAY:
+            raise CassetteMiss(f"no recorded answer for {site} in {self.path}")
+
+    def play(self, model: str, prompt: str, params: Dict[str, Any], site: str, live: Callable[[], str]) -> str:
+        """The recorded answer for this request, or live()'s answer recorded for next time."""
+        key = cache_key(model, prompt, params)
+        hit = self._next(key, site)
+        if hit is not None:
+            response, latency_s = hit
+            if self.latency_scale > 0:
+                time.sleep(latency_s * self.latency_scale)
+            return response
+        self._miss(site)
+        start = time.perf_counter()
+        response = live()
+        self._store(key, model, prompt, params, site, response, time.perf_counter() - start)
+        return response
+
+    async def aplay(self, model: str, prompt: str, params: Dict[str, Any], site: str,
+                    live: Callable[[], Awaitable[str]]) -> str:
+        key = cache_key(model, prompt, params)
+        hit = self._next(key, site)
+        if hit is not None:
+            response, latency_s = hit
+            if self.latency_scale > 0:
+                await asyncio.sleep(latency_s * self.latency_scale)
+            return response
+        self._miss(site)
+        start = time.perf_counter()
+        response = await live()
+        self._store(key, model, prompt, params, site, response, time.perf_counter() - start)
+        return response
+
+    def recall(self, site: str, item: Any) -> Optional[str]:
+        """The answer remembered for one item of a batched call, or None."""
+        key = _item_key(site, item)
+        hit = self._next(key, site)
+        return None if hit is None else hit[0]
+
+    def remember(self, site: str, item: Any, response: str):
+        """Record one item's share of a batched answer, for recall() on replay."""
+        if self.mode != REPLAY:
+            self._store(_item_key(site, item), f"item/{site}", _item_prompt(item), {}, site, response, 0.0)
+
+    def summary(self) -> Dict[str, Any]:
+        """Recorded interactions per site, with their upstream latency."""
+        rows = self._conn().execute(
+            "SELECT site, COUNT(*), COUNT(DISTINCT key), AVG(latency_s), MAX(latency_s) "
+            "FROM interactions GROUP BY site ORDER BY site"
+        ).fetchall()
+        return {site: {"interactions": n, "distinct_prompts": k, "mean_latency_ms": avg * 1000,
+                       "max_latency_ms": mx * 1000} for site, n, k, avg, mx in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        sites = set(self.hits) | set(self.misses) | set(self.recorded)
+        return {"mode": self.mode, "sites": {s: {"hits": self.hits[s], "misses": self.misses[s],
+                                                 "recorded": self.recorded[s]} for s in sorted(sites)}}
+
+
+def _item_prompt(item: Any) -> str:
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+def _item_key(site: str, item: Any) -> str:
+    return cache_key(f"item/{site}", _item_prompt(item), {})
+
+
+_default: Optional[Cassette] = None
+_default_lock = threading.Lock()
+
+
+def default_cassette() -> Optional[Cassette]:
+    """Process-wide cassette at LLM_CASSETTE, or None when it is unset.
+
+    LLM_CASSETTE_MODE picks record, replay or auto (default);
+    LLM_CASSETTE_LATENCY=1 replays at recorded speed, 0 (default) at full speed.
+    """
+    global _default
+    path = os.getenv("LLM_CASSETTE")
+    if not path:
+        return None
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Cassette(path, os.getenv("LLM_CASSETTE_MODE", AUTO),
+                                    float(os.getenv("LLM_CASSETTE_LATENCY", "0")))
+    return _default
+
+
+def after_fork_in_child():
+    """Locks for a forked child; SQLite connections are already per process."""
+    global _default_lock
+    _default_lock = threading.Lock()
+    if _default is not None:
+        _default._lock = threading.Lock()
+
+
+# running the main
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python cassette.py <cassette.sqlite>")
+    print(json.dumps(Cassette(sys.argv[1]).summary(), indent=2))
@@ -0,0 +1,59 @@
+import copy
+import dataclasses
+import os
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+_compact: Dict[type, type] = {}
+
+
+def compact_enabled() -> bool:
+    """GRAPH_STATE=compact runs graphs on slotted dataclasses instead of pydantic models."""
+    return os.getenv("GRAPH_STATE", "pydantic") == "compact"
+
+
+# Slotted mirrors of pydantic states
+
+def compact_of(model: Type[BaseModel]) -> type:
+    """Slotted dataclass with model's fields and defaults, generated once per model.
+
+    LangGraph rebuilds the state object for every node it runs; for a
+    pydantic model that means a full validation per node, for this class
+    just an __init__. The pydantic model stays the one place fields are
+    declared and is still used to validate input at the graph boundary.
+    """
+    cls = _compact.get(model)
+    if cls is None:
+        fields = []
+        for name, info in model.model_fields.items():
+            if info.is_required():
+                fields.append((name, info.annotation))
+            else:
+                default = info.get_default(call_default_factory=True)
+                fields.append((name, info.annotation,
+                               dataclasses.field(default_factory=lambda d=default: copy.copy(d))))
+        cls = dataclasses.make_dataclass(f"Compact{model.__name__}", fields, slots=True)
+        cls.__module__ = model.__module__
+        _compact[model] = cls
+    return cls
+
+
+def state_schema(model: Type[BaseModel]) -> type:
+    """Schema to hand StateGraph: model itself, or its compact mirror when enabled."""
+    return compact_of(model) if compact_enabled() else model
+
+
+def validated(model: Type[BaseModel], data: Any) -> Any:
+    """Graph input checked once against model, in the form state_schema(model) expects."""
+    state = data if isinstance(data, model) else model.model_validate(data)
+    if not compact_enabled():
+        return state
+    return compact_of(model)(**{name: getattr(state, name) for name in model.model_fields})
+
+
+def as_dict(state: Any) -> Dict[str, Any]:
+    """Plain dict of a pydantic or compact state."""
+    if isinstance(state, BaseModel):
+        return state.model_dump()
+    return {f.name: getattr(state, f.name) for f in dataclasses.fields(state)}
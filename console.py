@@ -0,0 +1,24 @@
+import os
+import sys
+from contextlib import contextmanager
+
+
+@contextmanager
+def quiet():
+    """Send stdout, where the workflows narrate their progress, to /dev/null.
+
+    The redirect is on file descriptor 1, so it covers every thread and
+    any worker process started inside the block; stderr is left alone for
+    the caller's own reporting.
+    """
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
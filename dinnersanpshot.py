@@ -1,24 +1,26 @@
-from dotenv import load_dotenv
-import os
 import json
-from typing import Dict, Optional
+import os
+from typing import Dict, Optional, Tuple
 from pydantic import BaseModel
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
-from langgraph.graph import StateGraph, START, END
-
-
-# Loading .env
-
-load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise SystemExit(" GOOGLE_API_KEY missing in .env file")
+import breaker
+import snapshotstore
+from alertrules import engine as alerts
+from snapshotpub import publisher
+from compactstate import state_schema, validated
+from hedging import run_with_deadline
+from llmclient import complete, parse_json
 
+# per-check budget; a check that misses it reuses its last good answer
+CHECK_DEADLINE_S = float(os.getenv("SNAPSHOT_DEADLINE_S", "3.0"))
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=api_key)
+# deterministic values from taskone, used before any answer has been seen
+DEFAULT_CHECKS = {
+    "inventory": {"steak": "low", "pasta": "ok", "lettuce": "ok"},
+    "floor": {"open_tables": 4, "waitlist": 12},
+    "delivery": {"drivers_on_duty": 5, "avg_eta_min": 28},
+}
+_last_good: Dict[Tuple[str, str], Dict] = {}
 
 
 #  State
@@ -29,32 +31,48 @@ class RestaurantState(BaseModel):
     floor: Optional[Dict[str, int]] = None
     delivery: Optional[Dict[str, int]] = None
     overall: Optional[str] = None
+    alert_level: Optional[str] = None
     summary: Optional[str] = None
 
 
 # Function
-def safe_json_call(prompt_template: str, context: Dict) -> Dict:
+def safe_json_call(prompt_template: str, context: Dict, site: str = "snapshot", hedge: bool = False) -> Dict:
     """
     Ensures the LLM always returns valid JSON.
     Retries parsing with relaxed rules if needed.
     """
-    prompt = ChatPromptTemplate.from_template(prompt_template)
-    parser = JsonOutputParser()
-    chain = prompt | llm | StrOutputParser()  # get raw text first
+    response_text = complete(prompt_template.format(**context), site=site, hedge=hedge, check=parse_json)
 
-    response_text = chain.invoke(context).strip()
-
-  
     try:
-        start = response_text.find("{")
-        end = response_text.rfind("}") + 1
-        json_str = response_text[start:end]
-        return json.loads(json_str)
+        return parse_json(response_text)
     except Exception:
         print("Warning: Non-JSON response received, fallback applied.")
         return {"error": "invalid_json", "raw_output": response_text}
 
 
+def guarded_check(kind: str, prompt_template: str, area: str) -> Dict:
+    """Hedged LLM check bounded by CHECK_DEADLINE_S, behind a circuit breaker.
+
+    A missed deadline, a non-JSON or incomplete answer, or an open circuit
+    makes the node answer with the area's last good value (or the taskone
+    default), so summarize_status never sees an error dict.
+    """
+    site = f"snapshot.{kind}"
+
+    def ask_llm() -> Dict:
+        result = run_with_deadline(
+            lambda: safe_json_call(prompt_template, {"area": area}, site=site, hedge=True),
+            CHECK_DEADLINE_S, site,
+        )
+        missing = DEFAULT_CHECKS[kind].keys() - result.keys()
+        if "error" in result or missing:
+            raise ValueError(result.get("error") or f"missing keys {sorted(missing)}")
+        _last_good[(kind, area)] = result
+        return result
+
+    return breaker.guard(site, ask_llm, lambda: _last_good.get((kind, area), DEFAULT_CHECKS[kind]))
+
+
 def check_inventory(state: RestaurantState) -> Dict:
     """Check restaurant stock levels."""
     prompt = """
@@ -62,7 +80,7 @@ def check_inventory(state: RestaurantState) -> Dict:
     Respond strictly in JSON format with three keys:
     {{"steak": "ok/low/critical", "pasta": "ok/low/critical", "lettuce": "ok/low/critical"}}
     """
-    result = safe_json_call(prompt, {"area": state.service_area})
+    result = guarded_check("inventory", prompt, state.service_area)
     return {"inventory": result}
 
 
@@ -73,7 +91,7 @@ def check_floor(state: RestaurantState) -> Dict:
     Return only valid JSON:
     {{"open_tables": <number>, "waitlist": <number>}}
     """
-    result = safe_json_call(prompt, {"area": state.service_area})
+    result = guarded_check("floor", prompt, state.service_area)
     return {"floor": result}
 
 
@@ -84,12 +102,17 @@ def check_delivery(state: RestaurantState) -> Dict:
     Return JSON with:
     {{"drivers_on_duty": <number>, "avg_eta_min": <number>}}
     """
-    result = safe_json_call(prompt, {"area": state.service_area})
+    result = guarded_check("delivery", prompt, state.service_area)
     return {"delivery": result}
 
 
 def summarize_status(state: RestaurantState) -> Dict:
-    """Summarize results from all nodes."""
+    """Summarize results from all nodes.
+
+    overall depends on this snapshot alone. alert_level is the shared alert
+    engine's level for the area (alertrules.DEFAULT_RULES), which holds a
+    level until the area is clearly past the threshold.
+    """
     waitlist = state.floor.get("waitlist", 0) if state.floor else 0
     eta = state.delivery.get("avg_eta_min", 0) if state.delivery else 0
     steak = state.inventory.get("steak", "ok") if state.inventory else "ok"
@@ -101,6 +124,9 @@ def summarize_status(state: RestaurantState) -> Dict:
     else:
         overall = "calm"
 
+    checks = {"inventory": state.inventory or {}, "floor": state.floor or {}, "delivery": state.delivery or {}}
+    alert_level = alerts.update_level(state.service_area, checks)
+
     summary_text = (
         f" Restaurant Area: {state.service_area}\n"
         f" Floor: {state.floor}\n"
@@ -108,18 +134,26 @@ def summarize_status(state: RestaurantState) -> Dict:
         f" Inventory: {state.inventory}\n"
         f" Overall Status: {overall.upper()}"
     )
+    snapshot = {"inventory": state.inventory, "floor": state.floor, "delivery": state.delivery, "overall": overall}
+    snapshotstore.record(state.service_area, snapshot)
+    publisher.publish(state.service_area, {**snapshot, "alert_level": alert_level, "summary": summary_text})
 
-    return {"overall": overall, "summary": summary_text}
+    return {"overall": overall, "alert_level": alert_level, "summary": summary_text}
 
 
 # Graph construction
 def build_dinner_graph():
-    graph = StateGraph(RestaurantState)
+    from langgraph.graph import StateGraph, START, END
+    from graphmetrics import node_adder
+    from eventlog import logged_graph, logged_nodes
+
+    graph = StateGraph(state_schema(RestaurantState))
+    add_node = logged_nodes(node_adder(graph, "dinner"), "dinner")
 
-    graph.add_node("check_inventory", check_inventory)
-    graph.add_node("check_floor", check_floor)
-    graph.add_node("check_delivery", check_delivery)
-    graph.add_node("summarize_status", summarize_status)
+    add_node("check_inventory", check_inventory)
+    add_node("check_floor", check_floor)
+    add_node("check_delivery", check_delivery)
+    add_node("summarize_status", summarize_status)
 
   
     graph.add_edge(START, "check_inventory")
@@ -133,7 +167,7 @@ def build_dinner_graph():
 
     graph.add_edge("summarize_status", END)
 
-    return graph.compile()
+    return logged_graph(graph.compile(), "dinner")
 
 
 # running main
@@ -142,7 +176,7 @@ if __name__ == "__main__":
     app.get_graph().print_ascii()
 
     print("\nRunning Dinner Rush Snapshot...\n")
-    result = app.invoke(RestaurantState(service_area="Downtown"))
+    result = app.invoke(validated(RestaurantState, {"service_area": "Downtown"}))
 
     print("\nFinal JSON Output:")
     print(json.dumps({
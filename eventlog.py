@@ -0,0 +1,432 @@
+import atexit
+import contextvars
+import dataclasses
+import fcntl
+import functools
+import inspect
+import json
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+MAGIC = b"EVLOG1\n\x00"
+# body length, run id, unix time, duration us, flags, len(workflow), len(node), len(fields)
+_HEADER = struct.Struct("<IQdIBHHH")
+FLAG_ERROR = 1
+FIELD_SEP = "\x1f"
+INPUT_NODE = "__input__"  # a run's first record: every field of the graph's input
+
+_run: contextvars.ContextVar = contextvars.ContextVar("eventlog_run", default=0)
+
+
+class Event(NamedTuple):
+    offset: int
+    run: int
+    ts: float
+    duration_us: int
+    error: bool
+    workflow: str
+    node: str
+    fields: Tuple[str, ...]
+    payload: bytes  # JSON {"changed": {...}} or {"error": "..."}; decode with .changes()
+
+    def changes(self) -> Dict[str, Any]:
+        return json.loads(self.payload).get("changed", {})
+
+
+# Runs
+
+def new_run_id() -> int:
+    return random.getrandbits(63) or 1
+
+
+@contextmanager
+def run(run_id: Optional[int] = None):
+    """Tag every node transition in this context (and graphs invoked from it) with one run id."""
+    run_id = run_id or new_run_id()
+    token = _run.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _run.reset(token)
+
+
+def scoped(fn: Callable) -> Callable:
+    """fn, run inside a fresh run() on every call (for handlers run in executors)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with run():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _shallow(obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return dict(obj)
+    if dataclasses.is_dataclass(obj):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    try:
+        return dict(obj)  # pydantic models iterate as (name, value)
+    except (TypeError, ValueError):
+        return {}
+
+
+def _json(value: Any) -> str:
+    try:
+        return json.dumps(value, separators=(",", ":"), default=str)
+    except ValueError:  # circular reference
+        return json.dumps(repr(value))
+
+
+def snapshot(obj: Any) -> Dict[str, str]:
+    """Each field of a state or update, JSON-encoded now.
+
+    Encoding at call time freezes the values, so later in-place changes
+    (state.heartbeats.append(...)) show up in the next diff and the writer
+    thread never touches live objects.
+    """
+    return {k: _json(v) for k, v in _shallow(obj).items()}
+
+
+# Writer
+
+class EventLog:
+    """Append-only, length-prefixed binary log of node transitions.
+
+    The node hot path JSON-encodes the state before and the update after
+    it runs (snapshot()) and pushes both onto a queue. A background thread
+    diffs the encoded fields, frames the records and appends each batch
+    with one write under an flock (so worker processes can share the
+    file), fsyncing at most every flush_interval_s.
+    """
+
+    def __init__(self, path: str, flush_interval_s: float = 0.05, max_queue: int = 100_000):
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+        self.max_queue = max_queue
+        self._queue: Deque[tuple] = deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()  # held while a batch is encoded and written
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+        self._closed = False
+        self.events = 0
+        self.dropped = 0
+        self.bytes = 0
+        self.fsyncs = 0
+        with open(path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            if f.tell() == 0:
+                f.write(MAGIC)
+            fcntl.flock(f, fcntl.LOCK_UN)
+        atexit.register(self.close)
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():  # first use, or a forked child without the writer thread
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._queue.clear()
+                    self._thread = threading.Thread(target=self._loop, name="eventlog", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def append(self, workflow: str, node: str, before: Dict[str, str], after: Optional[Dict[str, str]],
+               duration_s: float, error: Optional[BaseException] = None):
+        """Queue one transition; before and after come from snapshot()."""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._ensure_thread()
+        self._queue.append((_run.get(), time.time(), duration_s, workflow, node, before,
+                            None if error is not None else after, error))
+
+    def log_input(self, workflow: str, state: Any):
+        """Record a graph's input as its run's first transition, so replay starts from it."""
+        self.append(workflow, INPUT_NODE, {}, snapshot(state), 0.0)
+
+    def _encode(self, item: tuple) -> bytes:
+        run_id, ts, duration_s, workflow, node, before, after, error = item
+        if error is not None:
+            fields: List[str] = []
+            body = json.dumps({"error": f"{type(error).__name__}: {error}"}, default=str).encode()
+        else:
+            fields = [k for k, v in after.items() if before.get(k) != v]
+            body = ('{"changed":{' + ",".join(f"{json.dumps(k)}:{after[k]}" for k in fields) + "}}").encode()
+        w, n, f = workflow.encode(), node.encode(), FIELD_SEP.join(fields).encode()
+        length = _HEADER.size - 4 + len(w) + len(n) + len(f) + len(body)
+        header = _HEADER.pack(length, run_id, ts, min(int(duration_s * 1e6), 2 ** 32 - 1),
+                              FLAG_ERROR if error is not None else 0, len(w), len(n), len(f))
+        return b"".join((header, w, n, f, body))
+
+    def _write_batch(self):
+        batch = []
+        while self._queue:
+            batch.append(self._encode(self._queue.popleft()))
+        if not batch:
+            return
+        data = b"".join(batch)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self.events += len(batch)
+        self.bytes += len(data)
+        self.fsyncs += 1
+
+    def _loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far; returns once it is on disk."""
+        with self._lock:
+            self._write_batch()
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+    def wrap(self, workflow: str, node: str, fn: Callable) -> Callable:
+        """fn, logging the fields it changed after every call."""
+        log = self
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def logged_async(state, *args, **kwargs):
+                before = snapshot(state)
+                start = time.perf_counter()
+                try:
+                    update = await fn(state, *args, **kwargs)
+                except Exception as e:
+                    log.append(workflow, node, before, None, time.perf_counter() - start, e)
+                    raise
+                log.append(workflow, node, before, snapshot(update), time.perf_counter() - start)
+                return update
+            return logged_async
+
+        @functools.wraps(fn)
+        def logged(state, *args, **kwargs):
+            before = snapshot(state)
+            start = time.perf_counter()
+            try:
+                update = fn(state, *args, **kwargs)
+            except Exception as e:
+                log.append(workflow, node, before, None, time.perf_counter() - start, e)
+                raise
+            log.append(workflow, node, before, snapshot(update), time.perf_counter() - start)
+            return update
+        return logged
+
+    def stats(self) -> Dict[str, Any]:
+        return {"events": self.events, "queued": len(self._queue), "dropped": self.dropped,
+                "bytes": self.bytes, "fsyncs": self.fsyncs}
+
+
+_default: Optional[EventLog] = None
+_default_lock = threading.Lock()
+
+
+def default_log() -> Optional[EventLog]:
+    """Process-wide log at EVENT_LOG, or None when it is unset."""
+    global _default
+    path = os.getenv("EVENT_LOG")
+    if not path:
+        return None
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = EventLog(path, float(os.getenv("EVENT_LOG_FLUSH_S", "0.05")))
+    return _default
+
+
+def after_fork_in_child():
+    """Locks for a forked child; the writer thread restarts on the next append."""
+    global _default_lock
+    _default_lock = threading.Lock()
+    if _default is not None:
+        _default._lock = threading.Lock()
+        _default._start_lock = threading.Lock()
+
+
+# Graphs
+
+class LoggedGraph:
+    """A compiled graph whose invoke/ainvoke/stream/astream log the input before running it.
+
+    A call outside any run() gets a fresh run id, so its records replay
+    on their own. Everything else is the compiled graph's.
+    """
+
+    def __init__(self, app, log: EventLog, workflow: str):
+        self._app = app
+        self._log = log
+        self._workflow = workflow
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._app, name)
+
+    def invoke(self, input: Any, *args, **kwargs) -> Any:
+        with run() if not _run.get() else nullcontext():
+            self._log.log_input(self._workflow, input)
+            return self._app.invoke(input, *args, **kwargs)
+
+    async def ainvoke(self, input: Any, *args, **kwargs) -> Any:
+        with run() if not _run.get() else nullcontext():
+            self._log.log_input(self._workflow, input)
+            return await self._app.ainvoke(input, *args, **kwargs)
+
+    def stream(self, input: Any, *args, **kwargs) -> Iterator[Any]:
+        with run() if not _run.get() else nullcontext():
+            self._log.log_input(self._workflow, input)
+            yield from self._app.stream(input, *args, **kwargs)
+
+    async def astream(self, input: Any, *args, **kwargs) -> AsyncIterator[Any]:
+        with run() if not _run.get() else nullcontext():
+            self._log.log_input(self._workflow, input)
+            async for chunk in self._app.astream(input, *args, **kwargs):
+                yield chunk
+
+
+def logged_nodes(add_node: Callable, workflow: str) -> Callable:
+    """add_node that also logs each node's changed fields, when EVENT_LOG is set."""
+    log = default_log()
+    if log is None:
+        return add_node
+
+    def add_logged(name: str, fn: Callable, **kwargs):
+        return add_node(name, log.wrap(workflow, name, fn), **kwargs)
+    return add_logged
+
+
+def logged_graph(app, workflow: str):
+    """app, logging every invocation's input first, when EVENT_LOG is set."""
+    log = default_log()
+    return app if log is None else LoggedGraph(app, log, workflow)
+
+
+# Reader
+
+class EventLogReader:
+    """Memory-mapped scan of an event log.
+
+    Filters compare the fixed header and the short name strings straight
+    from the map; payloads are only sliced out for matching records, so
+    filtering millions of events never loads the file. A record cut short
+    by a crash ends the scan.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if size and self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an event log")
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def events(self, run: Optional[int] = None, workflow: Optional[str] = None, node: Optional[str] = None,
+               field: Optional[str] = None, since: Optional[float] = None) -> Iterator[Event]:
+        buf = self._map
+        end = len(buf)
+        pos = len(MAGIC)
+        unpack = _HEADER.unpack_from
+        hsize = _HEADER.size
+        w_want = workflow.encode() if workflow is not None else None
+        n_want = node.encode() if node is not None else None
+        f_want = field.encode() if field is not None else None
+        while pos + hsize <= end:
+            length, run_id, ts, dur, flags, wl, nl, fl = unpack(buf, pos)
+            nxt = pos + 4 + length
+            if nxt > end:
+                break
+            if (run is None or run_id == run) and (since is None or ts >= since):
+                s = pos + hsize
+                w = buf[s:s + wl]
+                n = buf[s + wl:s + wl + nl]
+                f = buf[s + wl + nl:s + wl + nl + fl]
+                if ((w_want is None or w == w_want) and (n_want is None or n == n_want)
+                        and (f_want is None or f_want in f.split(FIELD_SEP.encode()))):
+                    yield Event(pos, run_id, ts, dur, bool(flags & FLAG_ERROR), w.decode(), n.decode(),
+                                tuple(f.decode().split(FIELD_SEP)) if fl else (),
+                                bytes(buf[s + wl + nl + fl:nxt]))
+            pos = nxt
+
+    def runs(self) -> Dict[int, int]:
+        """Run id -> number of events."""
+        out: Dict[int, int] = {}
+        for e in self.events():
+            out[e.run] = out.get(e.run, 0) + 1
+        return out
+
+    def replay(self, run_id: int) -> Iterator[Tuple[Event, Dict[str, Any]]]:
+        """(event, state after it) for each transition of one run, in log order.
+
+        Runs started through logged_graph() begin with their input record.
+        """
+        state: Dict[str, Any] = {}
+        for e in self.events(run=run_id):
+            if not e.error:
+                state.update(e.changes())
+            yield e, dict(state)
+
+
+# running the main
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.mkdtemp(), "events.log")
+    n = 200_000
+    # a long flush interval keeps the encoder thread out of the timed loop,
+    # so this is the cost a node actually pays; close() writes the batch
+    log = EventLog(path, flush_interval_s=60, max_queue=n)
+    node = log.wrap("order", "route_order", lambda s: {"route": "delivery" if s["order_type"] == "delivery" else "takeout"})
+    plain = lambda s: {"route": "delivery" if s["order_type"] == "delivery" else "takeout"}
+    state = {"order_type": "delivery", "items": ["margherita pizza"], "route": ""}
+
+    start = time.perf_counter()
+    for _ in range(n):
+        plain(state)
+    base_us = (time.perf_counter() - start) / n * 1e6
+    start = time.perf_counter()
+    for i in range(n):
+        _run.set(i + 1)
+        node(state)
+    logged_us = (time.perf_counter() - start) / n * 1e6
+    start = time.perf_counter()
+    log.close()
+    write_s = time.perf_counter() - start
+
+    with EventLogReader(path) as reader:
+        start = time.perf_counter()
+        count = sum(1 for _ in reader.events(field="route"))
+        scan_s = time.perf_counter() - start
+        start = time.perf_counter()
+        one = list(reader.events(run=n // 2))
+        run_s = time.perf_counter() - start
+    print(json.dumps(log.stats(), indent=2))
+    print(f"node call: {base_us:.2f} us plain, {logged_us:.2f} us logged; "
+          f"background encode+write+fsync {write_s / n * 1e6:.2f} us/event")
+    print(f"filter by field: {count} events in {scan_s:.2f} s; one run: {len(one)} events in {run_s:.2f} s")
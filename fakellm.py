@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+LEVELS = ["ok", "ok", "ok", "low", "critical"]
+
+
+class FakeLLMError(RuntimeError):
+    """Injected provider failure."""
+
+
+# Rule-based answers per prompt family
+
+
+def _prompt_rng(prompt: str, seed: int) -> random.Random:
+    """Same prompt + seed -> same answer, whatever order calls arrive in."""
+    digest = hashlib.sha256(f"{seed}:{prompt}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _family(prompt: str) -> str:
+    if "order router" in prompt:
+        return "route"
+    if "JSON list of strings" in prompt:
+        return "bake_summary"
+    if "overall busyness" in prompt:
+        return "busyness"
+    if '"reason"' in prompt:
+        return "reason"
+    if '"steak"' in prompt:
+        return "inventory"
+    if '"open_tables"' in prompt:
+        return "floor"
+    if '"drivers_on_duty"' in prompt:
+        return "delivery"
+    return "text"
+
+
+def answer(prompt: str, seed: int = 0) -> str:
+    """Schema-valid canned answer for one of the repo's prompt families."""
+    rng = _prompt_rng(prompt, seed)
+    family = _family(prompt)
+
+    if family == "inventory":
+        return json.dumps({item: rng.choice(LEVELS) for item in ("steak", "pasta", "lettuce")})
+    if family == "floor":
+        return json.dumps({"open_tables": rng.randint(0, 12), "waitlist": rng.randint(0, 20)})
+    if family == "delivery":
+        return json.dumps({"drivers_on_duty": rng.randint(2, 10), "avg_eta_min": rng.randint(12, 40)})
+    if family == "route":
+        match = re.search(r'"order_type":\s*"([^"]*)"', prompt)
+        order_type = match.group(1) if match else ""
+        route = order_type if order_type in ("dine_in", "takeout", "delivery") else "unsupported"
+        return json.dumps({"route": route})
+    if family == "reason":
+        approved = re.search(r"Decision:\s*(yes|y)\b", prompt) is not None
+        reason = "Quote fits capacity and menu." if approved else "Quote needs revision before approval."
+        return json.dumps({"reason": reason})
+    if family == "bake_summary":
+        start, end = prompt.find("["), prompt.rfind("]") + 1
+        bakes = json.loads(prompt[start:end]) if start >= 0 else []
+        return json.dumps([
+            f"{b.get('item', 'Batch')} {b.get('status', 'finished')} after {b.get('attempts', '?')} attempt(s)."
+            for b in bakes
+        ])
+    if family == "busyness":
+        match = re.search(r'"waitlist":\s*(\d+)', prompt)
+        waitlist = int(match.group(1)) if match else rng.randint(0, 20)
+        return "very busy" if waitlist > 15 else "busy" if waitlist > 10 else "moderate" if waitlist > 5 else "calm"
+    return "OK"
+
+
+# Chat model
+
+
+class FakeChatModel(BaseChatModel):
+    """Offline stand-in for ChatGoogleGenerativeAI.
+
+    Answers come from answer(); latency is lognormal around median_ms with
+    per-family overrides, error_rate injects FakeLLMError, and streaming
+    emits one chunk per word token_ms apart.
+    """
+
+    median_ms: float = 0.0
+    sigma: float = 0.5
+    family_median_ms: Dict[str, float] = {}
+    error_rate: float = 0.0
+    token_ms: float = 0.0
+    seed: int = 0
+    calls: int = 0
+
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def from_env(cls) -> "FakeChatModel":
+        """Configure from FAKE_LLM_* environment variables."""
+        return cls(
+            median_ms=float(os.getenv("FAKE_LLM_MEDIAN_MS", "0")),
+            sigma=float(os.getenv("FAKE_LLM_SIGMA", "0.5")),
+            family_median_ms=json.loads(os.getenv("FAKE_LLM_FAMILY_MS", "{}")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            token_ms=float(os.getenv("FAKE_LLM_TOKEN_MS", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _prompt(self, messages: List[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    def _plan(self, prompt: str) -> float:
+        """Latency (seconds) for this call; raises when an error is injected."""
+        self.calls += 1
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise FakeLLMError("fake provider error")
+        median = self.family_median_ms.get(_family(prompt), self.median_ms)
+        if median <= 0:
+            return 0.0
+        return median * self._rng.lognormvariate(0.0, self.sigma) / 1000
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = self._prompt(messages)
+        delay = self._plan(prompt)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer(prompt, self.seed)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = self._prompt(messages)
+        delay = self._plan(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer(prompt, self.seed)))])
+
+    def _chunks(self, text: str) -> List[str]:
+        return re.findall(r"\S+\s*|\s+", text) or [text]
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        prompt = self._prompt(messages)
+        delay = self._plan(prompt)
+        if delay:
+            time.sleep(delay)
+        for piece in self._chunks(answer(prompt, self.seed)):
+            if self.token_ms:
+                time.sleep(self.token_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        prompt = self._prompt(messages)
+        delay = self._plan(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        for piece in self._chunks(answer(prompt, self.seed)):
+            if self.token_ms:
+                await asyncio.sleep(self.token_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
@@ -0,0 +1,275 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_enabled = os.getenv("GRAPH_METRICS", "0") == "1"
+_llm_time: contextvars.ContextVar = contextvars.ContextVar("graph_llm_time", default=None)
+_lock = threading.Lock()
+_probe: Optional[Callable[[str, str, str], None]] = None
+
+QUANTILES = (0.5, 0.95, 0.99)
+# serializing an update to size it costs more than timing the node, so only
+# every STATE_SAMPLE-th update of each node is sized (the first one always)
+STATE_SAMPLE = max(1, int(os.getenv("GRAPH_METRICS_STATE_SAMPLE", "16")))
+
+
+def enable(on: bool = True):
+    """Turn instrumentation on for graphs built from now on."""
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_probe(probe: Optional[Callable[[str, str, str], None]]):
+    """Call probe(workflow, node, "enter" | "exit") around every instrumented node; None removes it.
+
+    "enter" comes before the node runs and "exit" after its stats are
+    recorded, so the time between one node's exit and the next one's enter
+    is the graph's own work: applying the update and building the next state.
+    """
+    global _probe
+    _probe = probe
+
+
+# HDR-style histogram
+
+class Histogram:
+    """Log-linear histogram of non-negative integers (microseconds, bytes).
+
+    Values below 2**SUB_BITS get an exact bucket; above that every power of
+    two is split into 2**SUB_BITS linear buckets, so quantiles stay within
+    ~3% of the true value at any magnitude with a few hundred counters.
+    """
+    SUB_BITS = 4
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @classmethod
+    def _index(cls, v: int) -> int:
+        sub = 1 << cls.SUB_BITS
+        if v < sub:
+            return v
+        e = v.bit_length() - 1
+        return sub + (e - cls.SUB_BITS) * sub + ((v >> (e - cls.SUB_BITS)) & (sub - 1))
+
+    @classmethod
+    def _value(cls, index: int) -> int:
+        sub = 1 << cls.SUB_BITS
+        if index < sub:
+            return index
+        e = (index - sub) // sub + cls.SUB_BITS
+        low = (1 << e) | ((index % sub) << (e - cls.SUB_BITS))
+        return low + (1 << (e - cls.SUB_BITS)) // 2
+
+    def record(self, v: int):
+        v = max(0, int(v))
+        i = self._index(v)
+        self.counts[i] = self.counts.get(i, 0) + 1
+        self.count += 1
+        self.total += v
+        if v > self.max:
+            self.max = v
+
+    def quantile(self, q: float) -> int:
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                return min(self._value(i), self.max)
+        return self.max
+
+    def summary(self, scale: float = 1.0) -> Dict[str, float]:
+        out = {f"p{int(q * 100)}": self.quantile(q) * scale for q in QUANTILES}
+        out["max"] = self.max * scale
+        out["mean"] = (self.total / self.count * scale) if self.count else 0.0
+        return out
+
+
+class NodeStats:
+    def __init__(self):
+        self.wall_us = Histogram()
+        self.llm_us = Histogram()
+        self.local_us = Histogram()
+        self.state_bytes = Histogram()
+        self.updates = 0
+        self.errors = 0
+
+
+_stats: Dict[Tuple[str, str], NodeStats] = {}
+
+
+def _node_stats(workflow: str, node: str) -> NodeStats:
+    key = (workflow, node)
+    stats = _stats.get(key)
+    if stats is None:
+        with _lock:
+            stats = _stats.setdefault(key, NodeStats())
+    return stats
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+# Recording
+
+def after_fork_in_child():
+    global _lock
+    _lock = threading.Lock()  # may have been held by another parent thread
+
+
+def record_llm_time(seconds: float):
+    """Attribute LLM wall time to the node currently running in this context."""
+    acc = _llm_time.get()
+    if acc is not None:
+        acc[0] += seconds
+
+
+def _state_size(update: Any) -> int:
+    if hasattr(update, "model_dump"):
+        update = update.model_dump()
+    try:
+        return len(json.dumps(update, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _record(stats: NodeStats, start: float, acc: List[float], update: Any):
+    wall = time.perf_counter() - start
+    with _lock:
+        stats.wall_us.record(wall * 1e6)
+        stats.llm_us.record(acc[0] * 1e6)
+        stats.local_us.record((wall - acc[0]) * 1e6)
+        sample = stats.updates % STATE_SAMPLE == 0
+        stats.updates += 1
+    if sample:
+        size = _state_size(update)  # outside the lock: this is the slow part
+        with _lock:
+            stats.state_bytes.record(size)
+
+
+def _failed(stats: NodeStats):
+    with _lock:
+        stats.errors += 1
+
+
+def instrument(workflow: str, node: str, fn: Callable) -> Callable:
+    """Wrap a node function with timing, or return it untouched when disabled."""
+    if not _enabled:
+        return fn
+    stats = _node_stats(workflow, node)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def timed_async(*args, **kwargs):
+            if _probe is not None:
+                _probe(workflow, node, "enter")
+            acc = [0.0]
+            token = _llm_time.set(acc)
+            start = time.perf_counter()
+            try:
+                update = await fn(*args, **kwargs)
+            except Exception:
+                _failed(stats)
+                raise
+            finally:
+                _llm_time.reset(token)
+            _record(stats, start, acc, update)
+            if _probe is not None:
+                _probe(workflow, node, "exit")
+            return update
+        return timed_async
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        if _probe is not None:
+            _probe(workflow, node, "enter")
+        acc = [0.0]
+        token = _llm_time.set(acc)
+        start = time.perf_counter()
+        try:
+            update = fn(*args, **kwargs)
+        except Exception:
+            _failed(stats)
+            raise
+        finally:
+            _llm_time.reset(token)
+        _record(stats, start, acc, update)
+        if _probe is not None:
+            _probe(workflow, node, "exit")
+        return update
+    return timed
+
+
+def node_adder(graph, workflow: str) -> Callable:
+    """graph.add_node replacement that instruments every node it adds.
+
+    Nodes read the graph's own state schema rather than the one their
+    annotation names, so under GRAPH_STATE=compact they get the compact
+    state, not a revalidated pydantic model.
+    """
+    def add_node(name: str, fn: Callable, **kwargs):
+        kwargs.setdefault("input_schema", graph.state_schema)
+        return graph.add_node(name, instrument(workflow, name, fn), **kwargs)
+    return add_node
+
+
+# Export
+
+def export_json() -> Dict[str, Any]:
+    """Per-node latency (ms) and state-size summaries; sizes are from sampled updates."""
+    out: Dict[str, Any] = {}
+    with _lock:
+        for (workflow, node), s in sorted(_stats.items()):
+            out.setdefault(workflow, {})[node] = {
+                "count": s.wall_us.count,
+                "errors": s.errors,
+                "wall_ms": s.wall_us.summary(1e-3),
+                "llm_ms": s.llm_us.summary(1e-3),
+                "local_ms": s.local_us.summary(1e-3),
+                "state_bytes": s.state_bytes.summary(),
+            }
+    return out
+
+
+def export_prometheus(prefix: str = "graph_node") -> str:
+    """Prometheus text exposition: one summary per node and timing kind."""
+    lines = []
+    kinds = [("wall", "wall_us"), ("llm", "llm_us"), ("local", "local_us")]
+    with _lock:
+        items = sorted(_stats.items())
+        for kind, attr in kinds:
+            metric = f"{prefix}_{kind}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for (workflow, node), s in items:
+                h: Histogram = getattr(s, attr)
+                labels = f'workflow="{workflow}",node="{node}"'
+                for q in QUANTILES:
+                    lines.append(f'{metric}{{{labels},quantile="{q}"}} {h.quantile(q) / 1e6:.6f}')
+                lines.append(f"{metric}_sum{{{labels}}} {h.total / 1e6:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {h.count}")
+        lines.append(f"# TYPE {prefix}_state_bytes summary")
+        for (workflow, node), s in items:
+            labels = f'workflow="{workflow}",node="{node}"'
+            for q in QUANTILES:
+                lines.append(f'{prefix}_state_bytes{{{labels},quantile="{q}"}} {s.state_bytes.quantile(q)}')
+        lines.append(f"# TYPE {prefix}_errors_total counter")
+        for (workflow, node), s in items:
+            lines.append(f'{prefix}_errors_total{{workflow="{workflow}",node="{node}"}} {s.errors}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,195 @@
+import gc
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# name -> (module, builder function)
+BUILDERS: Dict[str, Tuple[str, str]] = {
+    "bake": ("baker", "build_graph"),
+    "order": ("orderrouter", "build_order_graph"),
+    "dinner": ("dinnersanpshot", "build_dinner_graph"),
+    "catering": ("orchas", "build_graph"),
+    "catering_tools": ("tasktwoo", "build_catering_graph"),
+    "bake_tools": ("taskfourf", "build_supervisor_graph"),
+    "router_tools": ("taskthreer", "build_router_graph"),
+}
+
+_compiled: Dict[str, Any] = {}
+_compile_ms: Dict[str, float] = {}
+_hits: Dict[str, int] = {}
+_lock = threading.Lock()
+_frozen = False
+
+# modules holding per-process clients, pools, in-flight calls or locks;
+# each has an after_fork_in_child() (summaryqueue registers its own)
+FORK_RESET = ("llmclient", "llmsched", "hedging", "breaker", "llmcache", "cassette", "eventlog",
+              "snapshotstore", "graphmetrics")
+
+
+class GraphValidationError(ValueError):
+    pass
+
+
+# Compile once
+
+def validate(name: str, app) -> None:
+    """Every node must be reachable from START and able to reach END."""
+    drawable = app.get_graph()
+    succ: Dict[str, List[str]] = {}
+    pred: Dict[str, List[str]] = {}
+    for edge in drawable.edges:
+        succ.setdefault(edge.source, []).append(edge.target)
+        pred.setdefault(edge.target, []).append(edge.source)
+
+    def walk(start: str, links: Dict[str, List[str]]) -> set:
+        seen, stack = {start}, [start]
+        while stack:
+            for nxt in links.get(stack.pop(), []):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    nodes = set(drawable.nodes)
+    unreachable = nodes - walk("__start__", succ)
+    dead_ends = nodes - walk("__end__", pred)
+    if unreachable or dead_ends:
+        raise GraphValidationError(
+            f"{name}: unreachable={sorted(unreachable)} cannot_finish={sorted(dead_ends)}"
+        )
+
+
+def get(name: str):
+    """Compiled, validated graph for name; built on first request only."""
+    app = _compiled.get(name)
+    if app is not None:
+        _hits[name] = _hits.get(name, 0) + 1
+        return app
+    with _lock:
+        app = _compiled.get(name)
+        if app is None:
+            module, builder = BUILDERS[name]
+            start = time.perf_counter()
+            app = getattr(importlib.import_module(module), builder)()
+            validate(name, app)
+            _compile_ms[name] = (time.perf_counter() - start) * 1000
+            _compiled[name] = app
+            _hits.setdefault(name, 0)
+        else:
+            _hits[name] = _hits.get(name, 0) + 1
+    return app
+
+
+# Pre-fork warm start
+
+def _after_fork_in_child():
+    # HTTP pools, worker threads and SQLite handles must not be shared with
+    # the parent, and a lock another parent thread held at fork time would
+    # never be released here
+    global _lock
+    _lock = threading.Lock()
+    for name in FORK_RESET:
+        module = sys.modules.get(name)
+        if module is not None:
+            module.after_fork_in_child()
+
+
+def preload(names: Optional[List[str]] = None) -> Dict[str, float]:
+    """Compile every graph in the parent before forking workers.
+
+    Afterwards the heap is frozen (gc.freeze) so collections in the
+    children don't touch the shared objects and copy their pages; LLM
+    clients are dropped in each child on fork so every worker opens its
+    own connections.
+    """
+    global _frozen
+    for name in names or list(BUILDERS):
+        get(name)
+    if not _frozen:
+        os.register_at_fork(after_in_child=_after_fork_in_child)
+        gc.collect()
+        gc.freeze()
+        _frozen = True
+    return dict(_compile_ms)
+
+
+# Reporting
+
+def report(workers: int = 1) -> Dict[str, Any]:
+    """Compile time each graph cost once and the time its reuse saved.
+
+    Without the registry every get() and every forked worker would
+    recompile, so saved time is compile_ms * (hits + workers - 1).
+    compile_ms includes importing the graph's module (and langgraph for
+    the first graph), which a cold worker pays as well.
+    """
+    graphs = {}
+    for name, ms in _compile_ms.items():
+        graphs[name] = {
+            "compile_ms": ms,
+            "reuses": _hits.get(name, 0),
+            "saved_ms": ms * (_hits.get(name, 0) + max(0, workers - 1)),
+        }
+    return {"graphs": graphs, "saved_ms": sum(g["saved_ms"] for g in graphs.values())}
+
+
+def _private_kb() -> int:
+    """Memory this process does not share with anyone (Private_Clean + Private_Dirty)."""
+    total = 0
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    total += int(line.split()[1])
+    except OSError:
+        return -1
+    return total
+
+
+def _fork_private_kb(work) -> int:
+    """Run work() in a forked child and return the child's private memory."""
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        try:
+            work()
+            os.write(w, str(_private_kb()).encode())
+        finally:
+            os._exit(0)
+    os.close(w)
+    with os.fdopen(r) as f:
+        value = f.read()
+    os.waitpid(pid, 0)
+    return int(value or -1)
+
+
+def fork_memory_report(names: Optional[List[str]] = None) -> Dict[str, int]:
+    """Private memory of a worker that compiles its own graphs vs one forked after preload()."""
+    names = names or list(BUILDERS)
+
+    def cold():
+        for name in names:
+            module, builder = BUILDERS[name]
+            getattr(importlib.import_module(module), builder)()
+
+    cold_kb = _fork_private_kb(cold)
+    preload(names)
+    warm_kb = _fork_private_kb(lambda: [get(name) for name in names])
+    return {"cold_worker_private_kb": cold_kb, "warm_worker_private_kb": warm_kb,
+            "saved_per_worker_kb": cold_kb - warm_kb}
+
+
+# running the main
+if __name__ == "__main__":
+    memory = fork_memory_report()
+    print("Compile times (ms):")
+    print(json.dumps({k: round(v, 1) for k, v in _compile_ms.items()}, indent=2))
+    print("\nPer-worker memory:")
+    print(json.dumps(memory, indent=2))
+    print("\nSavings for 8 workers:")
+    print(json.dumps(report(workers=8), indent=2))
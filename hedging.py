@@ -0,0 +1,203 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+HEDGE_QUANTILE = 0.95
+MIN_SAMPLES = 20
+MAX_HEDGE_RATIO = 0.1  # at most ~10% extra upstream calls
+# deadline calls allowed to hang on past their deadline before new ones fail
+# fast instead of queueing behind them for a free deadline thread
+MAX_STUCK = int(os.getenv("DEADLINE_MAX_STUCK", "48"))
+
+_hedge_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="hedge")
+_deadline_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="deadline")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+# Latency history per call site
+
+class LatencyTracker:
+    """Sliding window of recent upstream latencies for one call site."""
+
+    def __init__(self, window: int = 500):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self, q: float = HEDGE_QUANTILE) -> Optional[float]:
+        """When to send the duplicate, or None to not hedge this call."""
+        self.calls += 1
+        if self.hedges >= MAX_HEDGE_RATIO * self.calls:
+            return None
+        return self.percentile(q)
+
+
+trackers: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
+deadlines_missed: Dict[str, int] = defaultdict(int)
+deadlines_stuck: Dict[str, int] = defaultdict(int)  # timed out, still running
+deadlines_shed: Dict[str, int] = defaultdict(int)   # failed fast while too many were stuck
+_lock = threading.Lock()
+
+
+def _submit(pool: ThreadPoolExecutor, fn: Callable[[], Any]):
+    """pool.submit(fn) in a copy of the caller's context (graphmetrics' LLM timer, run ids)."""
+    return pool.submit(contextvars.copy_context().run, fn)
+
+
+# Hedged calls
+
+def hedged(fn: Callable[[], Any], site: str, quantile: float = HEDGE_QUANTILE) -> Any:
+    """Call fn; if it is slower than the site's p-quantile, race a duplicate.
+
+    The first answer wins. A losing thread can't be interrupted mid-request,
+    so it is abandoned and its result dropped.
+    """
+    tracker = trackers[site]
+    with _lock:
+        delay = tracker.hedge_delay(quantile)
+
+    def timed():
+        start = time.perf_counter()
+        result = fn()
+        tracker.record(time.perf_counter() - start)
+        return result
+
+    if delay is None:
+        return timed()
+    primary = _submit(_hedge_pool, timed)
+    try:
+        return primary.result(timeout=delay)
+    except FutureTimeout:
+        pass
+
+    with _lock:
+        tracker.hedges += 1
+    backup = _submit(_hedge_pool, timed)
+    done, _ = wait([primary, backup], return_when=FIRST_COMPLETED)
+    winner = done.pop()
+    if winner is backup:
+        with _lock:
+            tracker.hedge_wins += 1
+    primary.cancel()
+    backup.cancel()
+    if winner.exception() is not None:
+        # first finisher failed; give the other one its chance
+        other = backup if winner is primary else primary
+        return other.result()
+    return winner.result()
+
+
+async def ahedged(fn: Callable[[], Awaitable[Any]], site: str, quantile: float = HEDGE_QUANTILE) -> Any:
+    """hedged() for coroutines; the losing request is cancelled outright."""
+    tracker = trackers[site]
+    with _lock:
+        delay = tracker.hedge_delay(quantile)
+
+    async def timed():
+        start = time.perf_counter()
+        result = await fn()
+        tracker.record(time.perf_counter() - start)
+        return result
+
+    if delay is None:
+        return await timed()
+    primary = asyncio.ensure_future(timed())
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+
+    with _lock:
+        tracker.hedges += 1
+    backup = asyncio.ensure_future(timed())
+    pending = {primary, backup}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        with _lock:
+                            tracker.hedge_wins += 1
+                    return task.result()
+        return primary.result()  # both failed: surface the primary's error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# Deadlines
+
+def _unstick(site: str):
+    with _lock:
+        deadlines_stuck[site] -= 1
+
+
+def run_with_deadline(fn: Callable[[], Any], deadline_s: float, site: str = "default") -> Any:
+    """fn's result, or DeadlineExceeded once deadline_s has passed (fn keeps running).
+
+    fn runs in a copy of the caller's context. While MAX_STUCK calls are
+    still running past their deadline (a slow provider), new calls raise
+    DeadlineExceeded at once rather than wait for a free thread.
+    """
+    with _lock:
+        if sum(deadlines_stuck.values()) >= MAX_STUCK:
+            deadlines_missed[site] += 1
+            deadlines_shed[site] += 1
+            raise DeadlineExceeded(f"{site}: {MAX_STUCK} earlier calls are still running past their deadline")
+    future = _submit(_deadline_pool, fn)
+    try:
+        return future.result(timeout=deadline_s)
+    except FutureTimeout:
+        with _lock:
+            deadlines_missed[site] += 1
+            if not future.cancel():  # already running: count it until it returns
+                deadlines_stuck[site] += 1
+                future.add_done_callback(lambda _: _unstick(site))
+        raise DeadlineExceeded(f"{site} exceeded {deadline_s:.2f}s")
+
+
+def stats() -> Dict[str, Any]:
+    out = {}
+    for site, t in trackers.items():
+        out[site] = {
+            "calls": t.calls,
+            "hedges": t.hedges,
+            "hedge_wins": t.hedge_wins,
+            "p50_s": t.percentile(0.5),
+            "p95_s": t.percentile(0.95),
+            "deadlines_missed": deadlines_missed.get(site, 0),
+            "deadlines_stuck": deadlines_stuck.get(site, 0),
+            "deadlines_shed": deadlines_shed.get(site, 0),
+        }
+    for site, n in deadlines_missed.items():
+        out.setdefault(site, {"deadlines_missed": n, "deadlines_stuck": deadlines_stuck.get(site, 0),
+                              "deadlines_shed": deadlines_shed.get(site, 0)})
+    return out
+
+
+def after_fork_in_child():
+    """New pools and lock; the parent's pool threads and stuck calls don't exist here."""
+    global _hedge_pool, _deadline_pool, _lock
+    _lock = threading.Lock()
+    _hedge_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="hedge")
+    _deadline_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="deadline")
+    deadlines_stuck.clear()
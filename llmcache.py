@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+# seconds a response stays valid, per call site
+SITE_TTLS = {
+    "route_order": 24 * 3600,
+    "manager_gate": 3600,
+    "snapshot": 60,
+    "bake_summary": 3600,
+    "busyness": 300,
+}
+DEFAULT_TTL = 600
+DEFAULT_PATH = ".llm_cache.sqlite"
+MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed);
+"""
+
+
+def cache_key(model: str, prompt: str, params: Dict[str, Any]) -> str:
+    """Content address of one request: sha256 over model, prompt and parameters."""
+    raw = json.dumps([model, prompt, params], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# SQLite response cache
+
+class LLMCache:
+    """Content-addressed LLM response cache in a local SQLite file.
+
+    WAL mode lets any number of worker processes read and write the same
+    file; each process (and thread) opens its own connection, so the cache
+    also survives fork. Entries expire per call site and the least recently
+    used ones are evicted once the file holds more than max_bytes of text.
+    Hits don't write: their access times are kept in memory and written in
+    one transaction once touch_every entries have been hit and before each
+    eviction, so concurrent readers never queue for the write lock. Keys
+    include the LLM backend, so answers from the fake backend never
+    stand in for Gemini's.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        site_ttls: Optional[Dict[str, int]] = None,
+        max_bytes: int = MAX_BYTES,
+        evict_every: int = 100,
+        touch_every: int = 256,
+    ):
+        self.path = path
+        self.site_ttls = {**SITE_TTLS, **(site_ttls or {})}
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self.touch_every = touch_every
+        self._touched: Dict[str, float] = {}  # key -> last hit, not yet written
+        self.backend = os.getenv("LLM_BACKEND") or "gemini"
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._puts = 0
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.evictions = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def ttl(self, site: str) -> int:
+        """TTL for site; "snapshot.floor" falls back to the "snapshot" entry."""
+        if site in self.site_ttls:
+            return self.site_ttls[site]
+        return self.site_ttls.get(site.split(".")[0], DEFAULT_TTL)
+
+    def _key(self, model: str, prompt: str, params: Dict[str, Any]) -> str:
+        return cache_key(f"{self.backend}/{model}", prompt, params)
+
+    def get(self, model: str, prompt: str, params: Dict[str, Any], site: str = "default") -> Optional[str]:
+        key = self._key(model, prompt, params)
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT value FROM responses WHERE key = ? AND created > ?",
+            (key, now - self.ttl(site)),
+        ).fetchone()
+        with self._stats_lock:
+            if row is None:
+                self.misses[site] += 1
+                return None
+            self.hits[site] += 1
+            self._touched[key] = now
+            flush = len(self._touched) >= self.touch_every
+        if flush:
+            self.flush_touches()
+        return row[0]
+
+    def flush_touches(self):
+        """Write the access times of the hits since the last flush, in one transaction."""
+        with self._stats_lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany("UPDATE responses SET accessed = ? WHERE key = ?",
+                             [(at, key) for key, at in touched.items()])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def put(self, model: str, prompt: str, params: Dict[str, Any], value: str, site: str = "default"):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO responses (key, site, value, size, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self._key(model, prompt, params), site, value, len(value.encode("utf-8")), now, now),
+        )
+        with self._stats_lock:
+            self._puts += 1
+            evict = self._puts % self.evict_every == 0
+        if evict:
+            self.evict()
+
+    def delete(self, model: str, prompt: str, params: Dict[str, Any]):
+        self._conn().execute("DELETE FROM responses WHERE key = ?", (self._key(model, prompt, params),))
+
+    def evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes."""
+        self.flush_touches()
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * 0.9)
+        freed, victims = 0, []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        with self._stats_lock:
+            self.evictions += len(victims)
+
+    def clear(self):
+        self._conn().execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-site hit rates for this process plus the shared file's size."""
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        sites = {}
+        with self._stats_lock:
+            hits, misses = dict(self.hits), dict(self.misses)
+        for site in set(hits) | set(misses):
+            h, m = hits.get(site, 0), misses.get(site, 0)
+            sites[site] = {"hits": h, "misses": m, "hit_rate": h / (h + m) if h + m else 0.0}
+        return {"entries": entries, "bytes": size, "evictions": self.evictions, "sites": sites}
+
+
+_default: Optional[LLMCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> Optional[LLMCache]:
+    """Process-wide cache at LLM_CACHE_PATH, or None when LLM_CACHE=0.
+
+    The fake backend is uncached unless LLM_CACHE=1 asks for it.
+    """
+    global _default
+    fake = os.getenv("LLM_BACKEND") == "fake"
+    if os.getenv("LLM_CACHE", "0" if fake else "1") == "0":
+        return None
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = LLMCache(os.getenv("LLM_CACHE_PATH", DEFAULT_PATH))
+    return _default
+
+
+def after_fork_in_child():
+    """In a forked child: unheld locks (each process opens its own connection anyway)."""
+    global _default_lock
+    _default_lock = threading.Lock()
+    if _default is not None:
+        _default._stats_lock = threading.Lock()
+        _default._touched = {}  # the parent writes its own
@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from graphmetrics import record_llm_time
+from hedging import ahedged, hedged
+from llmsched import default_scheduler
+from singleflight import SingleFlight
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+_clients: Dict[Tuple, Any] = {}
+_lock = threading.Lock()
+_env_loaded = False
+
+# identical in-flight prompts share one upstream call
+flights = SingleFlight()
+
+
+class MissingAPIKeyError(RuntimeError):
+    pass
+
+
+# Environment
+
+def load_env():
+    """Load .env once per process."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def api_key() -> str:
+    """GOOGLE_API_KEY from the environment or .env.
+
+    Raises MissingAPIKeyError, an ordinary exception, because this runs
+    lazily inside graph nodes, worker threads and shard processes whose
+    error handling (breakers, executors) only catches Exception.
+    """
+    load_env()
+    key = os.getenv("GOOGLE_API_KEY")
+    if not key:
+        raise MissingAPIKeyError("GOOGLE_API_KEY not set in environment")
+    return key
+
+
+def _pool_args() -> Dict[str, Any]:
+    """httpx settings for the connection pool shared by every workflow."""
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_S", "60")),
+        ),
+    }
+
+
+# Client factory
+
+def get_llm(model: str = DEFAULT_MODEL, **kwargs):
+    """Shared chat model for model/kwargs, created on first use.
+
+    langchain_google_genai is only imported here, so modules that never
+    talk to Gemini don't pay for it, and a missing key only fails the call
+    that needs it. Every caller of the same configuration shares one client
+    and with it one pooled HTTP transport. LLM_BACKEND=fake swaps in the
+    offline fakellm.FakeChatModel (configured by FAKE_LLM_* variables).
+    """
+    key = (model, tuple(sorted(kwargs.items())))
+    llm = _clients.get(key)
+    if llm is not None:
+        return llm
+    with _lock:
+        llm = _clients.get(key)
+        if llm is None:
+            load_env()
+            if os.getenv("LLM_BACKEND") == "fake":
+                from fakellm import FakeChatModel
+
+                llm = FakeChatModel.from_env()
+            else:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                llm = ChatGoogleGenerativeAI(
+                    model=model,
+                    api_key=api_key(),
+                    client_args=_pool_args(),
+                    **kwargs,
+                )
+            _clients[key] = llm
+    return llm
+
+
+# Completions
+
+def _text(response) -> str:
+    content = response.content
+    if isinstance(content, list):
+        content = "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return (content or "").strip()
+
+
+def _usable(text: str, check: Optional[Callable[[str], Any]]) -> bool:
+    """Whether text is worth caching: non-empty and accepted by the caller's parser."""
+    if not text:
+        return False
+    if check is None:
+        return True
+    try:
+        check(text)
+    except Exception:
+        return False
+    return True
+
+
+def _flight(site: str, flight_key: Any, model: str, prompt: str, params: Dict[str, Any]) -> Any:
+    from llmcache import cache_key
+    return (site, model, flight_key) if flight_key is not None else cache_key(model, prompt, params)
+
+
+def complete(prompt: str, site: str = "default", model: str = DEFAULT_MODEL, hedge: bool = False,
+             check: Optional[Callable[[str], Any]] = None, flight_key: Any = None, **params) -> str:
+    """Text answer for prompt, served from the shared response cache when possible.
+
+    site names the call site; it picks the cache TTL and labels metrics.
+    Identical prompts already in flight on another thread share that call.
+    hedge=True races a duplicate request once the call outlives the site's
+    p95 latency (see hedging.hedged). Every upstream request waits for
+    admission from the shared priority scheduler (llmsched). With
+    LLM_CASSETTE set, answers are recorded to or replayed from that
+    cassette instead, bypassing the cache. check is the caller's parser:
+    answers it rejects are returned but never cached, and a cached answer
+    it rejects is dropped and fetched again. flight_key replaces the prompt
+    as the coalescing key when only part of the prompt decides the answer.
+    """
+    from cassette import default_cassette
+    from llmcache import default_cache
+
+    def upstream() -> str:
+        with default_scheduler().slot(site):
+            return _text(get_llm(model, **params).invoke(prompt))
+
+    tape = default_cassette()
+    if tape is not None:
+        start = time.perf_counter()
+        try:
+            return tape.play(model, prompt, params, site, lambda: hedged(upstream, site) if hedge else upstream())
+        finally:
+            record_llm_time(time.perf_counter() - start)
+
+    cache = default_cache()
+    if cache is not None:
+        cached = cache.get(model, prompt, params, site)
+        if cached is not None:
+            if _usable(cached, check):
+                return cached
+            cache.delete(model, prompt, params)
+
+    def call() -> str:
+        text = hedged(upstream, site) if hedge else upstream()
+        if cache is not None and _usable(text, check):
+            cache.put(model, prompt, params, text, site)
+        return text
+
+    start = time.perf_counter()
+    try:
+        return flights.do(_flight(site, flight_key, model, prompt, params), call, site)
+    finally:
+        record_llm_time(time.perf_counter() - start)
+
+
+async def acomplete(prompt: str, site: str = "default", model: str = DEFAULT_MODEL, hedge: bool = False,
+                    check: Optional[Callable[[str], Any]] = None, flight_key: Any = None, **params) -> str:
+    """complete() for coroutines: ainvoke on the event loop, coalesced per loop."""
+    from cassette import default_cassette
+    from llmcache import default_cache
+
+    async def upstream() -> str:
+        async with default_scheduler().aslot(site):
+            return _text(await get_llm(model, **params).ainvoke(prompt))
+
+    tape = default_cassette()
+    if tape is not None:
+        start = time.perf_counter()
+        try:
+            return await tape.aplay(model, prompt, params, site, lambda: ahedged(upstream, site) if hedge else upstream())
+        finally:
+            record_llm_time(time.perf_counter() - start)
+
+    cache = default_cache()
+    if cache is not None:
+        cached = cache.get(model, prompt, params, site)
+        if cached is not None:
+            if _usable(cached, check):
+                return cached
+            cache.delete(model, prompt, params)
+
+    async def call() -> str:
+        text = await (ahedged(upstream, site) if hedge else upstream())
+        if cache is not None and _usable(text, check):
+            cache.put(model, prompt, params, text, site)
+        return text
+
+    start = time.perf_counter()
+    try:
+        return await flights.ado(_flight(site, flight_key, model, prompt, params), call, site)
+    finally:
+        record_llm_time(time.perf_counter() - start)
+
+
+def parse_json(text: str, opener: str = "{", closer: str = "}") -> Any:
+    """Parse the outermost JSON object (or list) in an LLM answer, ignoring fences and chatter."""
+    start = text.find(opener)
+    end = text.rfind(closer) + 1
+    return json.loads(text[start:end])
+
+
+def reset_clients():
+    """Drop cached clients (tests, or after fork before first use)."""
+    with _lock:
+        _clients.clear()
+
+
+def after_fork_in_child():
+    """Fresh clients, lock and single-flight table: the parent's calls never finish here."""
+    global _lock, flights
+    _lock = threading.Lock()
+    _clients.clear()
+    flights = SingleFlight()
@@ -0,0 +1,337 @@
+import asyncio
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional
+
+from graphmetrics import Histogram
+
+# priority classes, lower runs first
+CRITICAL = 0
+INTERACTIVE = 1
+BACKGROUND = 2
+CLASS_NAMES = {CRITICAL: "critical", INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# call site -> (priority class, workflow); "snapshot.floor" falls back to "snapshot"
+SITES = {
+    "route_order": (CRITICAL, "order"),
+    "snapshot": (INTERACTIVE, "dinner"),
+    "busyness": (INTERACTIVE, "dinner"),
+    "manager_gate": (BACKGROUND, "catering"),
+    "bake_summary": (BACKGROUND, "bake"),
+}
+DEFAULT_SITE = (INTERACTIVE, "default")
+
+# most upstream calls one workflow may have in flight at once
+WORKFLOW_QUOTAS = {"order": 16, "dinner": 8, "catering": 2, "bake": 2}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def site_info(site: str):
+    if site in SITES:
+        return SITES[site]
+    return SITES.get(site.split(".")[0], DEFAULT_SITE)
+
+
+# Token buckets
+
+class TokenBucket:
+    """Requests-per-second limit for this process; rate 0 means unlimited."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, floor: float = 0.0) -> bool:
+        """Spend one token if at least floor + 1 are left (floor keeps headroom for higher classes)."""
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < floor + 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def next_token_s(self) -> float:
+        return max(0.001, (1 - self.tokens % 1) / self.rate) if self.rate > 0 else 0.05
+
+
+class SharedTokenBucket(TokenBucket):
+    """The same bucket kept in a SQLite file, so every worker process on the
+    host draws from one API quota instead of each assuming it has it all."""
+
+    def __init__(self, rate: float, burst: float, path: str):
+        super().__init__(rate, burst)
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.execute("INSERT OR IGNORE INTO bucket VALUES (0, ?, ?)", (self.burst, time.time()))
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, floor: float = 0.0) -> bool:
+        if self.rate <= 0:
+            return True
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated = conn.execute("SELECT tokens, updated FROM bucket WHERE id = 0").fetchone()
+            now = time.time()
+            self.tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            ok = self.tokens >= floor + 1
+            if ok:
+                self.tokens -= 1
+            conn.execute("UPDATE bucket SET tokens = ?, updated = ? WHERE id = 0", (self.tokens, now))
+        finally:
+            conn.execute("COMMIT")
+        return ok
+
+
+# Scheduler
+
+class _Waiter:
+    __slots__ = ("cls", "workflow", "enqueued", "granted", "event", "future", "loop")
+
+    def __init__(self, cls: int, workflow: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.cls = cls
+        self.workflow = workflow
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class LLMScheduler:
+    """Admission control for upstream LLM calls shared by every workflow.
+
+    A call waits until three things allow it: a free slot in the global
+    concurrency budget, a free slot in its workflow's quota, and a token
+    from the rate limiter. Waiters are admitted strictly by priority class,
+    then arrival. The last reserved_slots of the budget and the last
+    reserved_tokens of the bucket only ever go to CRITICAL calls, so a
+    burst of background summaries can't starve order routing.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 20,
+        reserved_slots: int = 4,
+        rate_per_s: float = 0.0,
+        burst: Optional[float] = None,
+        reserved_tokens: float = 0.0,
+        quotas: Optional[Dict[str, int]] = None,
+        shared_path: Optional[str] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.reserved_slots = reserved_slots
+        self.reserved_tokens = reserved_tokens
+        self.quotas = {**WORKFLOW_QUOTAS, **(quotas or {})}
+        burst = burst if burst is not None else max(1.0, rate_per_s)
+        self.bucket = (SharedTokenBucket(rate_per_s, burst, shared_path) if shared_path
+                       else TokenBucket(rate_per_s, burst))
+
+        self._lock = threading.Lock()
+        self._waiting: List = []  # heap of (class, seq, waiter)
+        self._seq = itertools.count()
+        self.in_flight = 0
+        self.running: Dict[str, int] = defaultdict(int)
+        self.wait_us: Dict[int, Histogram] = defaultdict(Histogram)
+        self.admitted: Dict[int, int] = defaultdict(int)
+
+    def _slot_limit(self, cls: int) -> int:
+        return self.max_concurrency if cls == CRITICAL else self.max_concurrency - self.reserved_slots
+
+    def _dispatch(self):
+        """Admit every waiter that fits, best class first. Caller holds the lock."""
+        skipped = []
+        while self._waiting:
+            cls, seq, w = self._waiting[0]
+            if self.in_flight >= self._slot_limit(cls) or self.running[w.workflow] >= self.quotas.get(w.workflow, self.max_concurrency):
+                # blocked on its own limits; a lower class with spare quota may still go
+                skipped.append(heapq.heappop(self._waiting))
+                continue
+            if not self.bucket.take(0.0 if cls == CRITICAL else self.reserved_tokens):
+                break  # no token for this class, so none for anyone behind it either
+            heapq.heappop(self._waiting)
+            self.in_flight += 1
+            self.running[w.workflow] += 1
+            self.admitted[cls] += 1
+            self.wait_us[cls].record((time.perf_counter() - w.enqueued) * 1e6)
+            w.granted = True
+            w.wake()
+        for item in skipped:
+            heapq.heappush(self._waiting, item)
+
+    def _enqueue(self, site: str, loop=None) -> _Waiter:
+        cls, workflow = site_info(site)
+        w = _Waiter(cls, workflow, loop)
+        with self._lock:
+            heapq.heappush(self._waiting, (cls, next(self._seq), w))
+            self._dispatch()
+        return w
+
+    def _poll(self, w: _Waiter) -> bool:
+        with self._lock:
+            if not w.granted:
+                self._dispatch()
+            return w.granted
+
+    def _abandon(self, w: _Waiter):
+        with self._lock:
+            if w.granted:
+                self._release(w.workflow)
+            else:
+                self._waiting = [item for item in self._waiting if item[2] is not w]
+                heapq.heapify(self._waiting)
+
+    def _release(self, workflow: str):
+        self.in_flight -= 1
+        self.running[workflow] -= 1
+        self._dispatch()
+
+    def release(self, workflow: str):
+        with self._lock:
+            self._release(workflow)
+
+    @contextmanager
+    def slot(self, site: str):
+        """Hold one admission for site for the duration of the block."""
+        w = self._enqueue(site)
+        try:
+            # empty buckets don't release anyone, so re-check when the next token is due
+            while not w.granted and not w.event.wait(self.bucket.next_token_s()):
+                self._poll(w)
+        except BaseException:
+            self._abandon(w)
+            raise
+        try:
+            yield
+        finally:
+            self.release(w.workflow)
+
+    @asynccontextmanager
+    async def aslot(self, site: str):
+        w = self._enqueue(site, asyncio.get_running_loop())
+        try:
+            while not w.granted:
+                try:
+                    await asyncio.wait_for(asyncio.shield(w.future), self.bucket.next_token_s())
+                except asyncio.TimeoutError:
+                    self._poll(w)
+        except BaseException:
+            self._abandon(w)
+            raise
+        try:
+            yield
+        finally:
+            self.release(w.workflow)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waiting = defaultdict(int)
+            for cls, _, _ in self._waiting:
+                waiting[cls] += 1
+            classes = {}
+            for cls, name in CLASS_NAMES.items():
+                classes[name] = {
+                    "admitted": self.admitted[cls],
+                    "waiting": waiting[cls],
+                    "queue_wait_ms": self.wait_us[cls].summary(scale=1e-3),
+                }
+            return {
+                "in_flight": self.in_flight,
+                "running": {k: v for k, v in self.running.items() if v},
+                "classes": classes,
+            }
+
+
+_default: Optional[LLMScheduler] = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler() -> LLMScheduler:
+    """Process-wide scheduler configured from LLM_* environment variables.
+
+    LLM_MAX_CONCURRENCY defaults to the HTTP pool size so admission, not the
+    pool, is where calls queue. LLM_RATE_PER_S=0 leaves the rate unlimited;
+    LLM_SCHED_PATH shares the token bucket between processes.
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                rate = float(os.getenv("LLM_RATE_PER_S", "0"))
+                _default = LLMScheduler(
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", os.getenv("LLM_MAX_CONNECTIONS", "20"))),
+                    reserved_slots=int(os.getenv("LLM_RESERVED_SLOTS", "4")),
+                    rate_per_s=rate,
+                    burst=float(os.getenv("LLM_BURST", str(max(1.0, rate)))),
+                    reserved_tokens=float(os.getenv("LLM_RESERVED_TOKENS", str(rate * 0.2))),
+                    shared_path=os.getenv("LLM_SCHED_PATH") or None,
+                )
+    return _default
+
+
+def reset():
+    """Forget the process-wide scheduler (after fork, or to pick up new settings)."""
+    global _default
+    with _default_lock:
+        _default = None
+
+
+def after_fork_in_child():
+    global _default, _default_lock
+    _default_lock = threading.Lock()  # may have been held by another parent thread
+    _default = None
+
+
+# running the main
+if __name__ == "__main__":
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+
+    # a flood of background summaries and catering reasons against a trickle of
+    # order routing, all sharing 10 requests/s and 8 connections
+    sched = LLMScheduler(max_concurrency=8, reserved_slots=2, rate_per_s=10, burst=10, reserved_tokens=2)
+
+    def fake_call(site: str, seconds: float):
+        with sched.slot(site):
+            time.sleep(seconds)
+
+    with ThreadPoolExecutor(max_workers=64) as pool:
+        background = [pool.submit(fake_call, site, 0.3) for site in ["bake_summary", "manager_gate"] * 20]
+        for _ in range(10):
+            time.sleep(0.3)
+            pool.submit(fake_call, "route_order", 0.2)
+            pool.submit(fake_call, "snapshot.floor", 0.2)
+    print(json.dumps(sched.stats(), indent=2))
@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from graphmetrics import Histogram
+
+AREAS = [f"area-{i:03d}" for i in range(300)]
+ORDER_TYPES = ["dine_in", "takeout", "delivery", "delivery", "curbside"]
+DISHES = ["margherita pizza", "caesar salad", "pasta primavera", "steak frites", "tiramisu", "garlic bread"]
+CATERING_MENU = ["grilled chicken", "pasta", "salad", "dessert", "paneer tikka", "naan", "steak", "lobster"]
+BAKE_ITEMS = {"sourdough": 230, "baguette": 240, "focaccia": 220, "croissant": 190}
+
+DEFAULT_MIX = {"order": 0.6, "snapshot": 0.3, "bake": 0.07, "catering": 0.03}
+
+
+# Synthetic requests
+
+def synth_request(workflow: str, rng: random.Random) -> Dict[str, Any]:
+    if workflow == "order":
+        return {
+            "order_type": rng.choice(ORDER_TYPES),
+            "items": rng.sample(DISHES, rng.randint(1, 4)),
+            "address": f"{rng.randint(1, 999)} King St W",
+            "requested_time": "ASAP",
+        }
+    if workflow == "snapshot":
+        return {"service_area": rng.choice(AREAS)}
+    if workflow == "catering":
+        return {
+            "event_date": "2025-11-12",
+            "headcount": rng.randint(20, 200),
+            "menu": rng.sample(CATERING_MENU, rng.randint(1, 4)),
+        }
+    item = rng.choice(list(BAKE_ITEMS))
+    return {"item": item, "target_temp_c": BAKE_ITEMS[item], "batch_size": rng.randint(4, 24)}
+
+
+# Entry points: the compiled graphs each workflow exposes
+
+def entry_points() -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    import baker
+    import dinnersanpshot
+    import orchas
+    import orderrouter
+    from compactstate import validated
+    from eventlog import scoped
+
+    order_app = orderrouter.build_order_graph()
+    snapshot_app = dinnersanpshot.build_dinner_graph()
+    catering_app = orchas.build_graph()
+    bake_app = baker.build_graph()
+
+    def catering(req: Dict[str, Any]) -> Any:
+        # the manager gate is auto-approved; nobody is at the keyboard
+        orchas.approver.set(lambda state: True)
+        return catering_app.invoke(req)
+
+    # one event-log run per request
+    return {
+        "order": scoped(order_app.invoke),
+        "snapshot": scoped(lambda req: snapshot_app.invoke(validated(dinnersanpshot.RestaurantState, req))),
+        "catering": scoped(catering),
+        "bake": scoped(lambda req: bake_app.invoke(validated(baker.BakeState, req))),
+    }
+
+
+# Arrival patterns
+
+def poisson_arrivals(rate: float, duration_s: float, mix: Dict[str, float], seed: int = 0) -> Iterator[Tuple[float, str]]:
+    """(offset_s, workflow) pairs with exponential inter-arrival times."""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    t = rng.expovariate(rate)
+    while t < duration_s:
+        yield t, rng.choices(names, weights)[0]
+        t += rng.expovariate(rate)
+
+
+def recorded_arrivals(path: str, speedup: float = 1.0) -> Iterator[Tuple[float, str]]:
+    """Replay a JSON-lines trace of {"t": seconds, "workflow": name} records."""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    t0 = records[0]["t"] if records else 0.0
+    for rec in records:
+        yield (rec["t"] - t0) / speedup, rec["workflow"]
+
+
+# Open-loop driver
+
+async def drive(
+    arrivals: Iterator[Tuple[float, str]],
+    handlers: Dict[str, Callable],
+    workers: int = 32,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Fire every arrival at its scheduled time, whether or not earlier ones finished.
+
+    Latency runs from the scheduled arrival to completion, so time spent
+    queued behind busy workers is counted instead of hidden.
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    hists: Dict[str, Histogram] = {}
+    errors: Dict[str, int] = {}
+    done_at: List[float] = []
+    pending: List[asyncio.Future] = []
+    start = time.perf_counter()
+
+    async def one(scheduled: float, workflow: str, request: Dict[str, Any]):
+        try:
+            await loop.run_in_executor(pool, handlers[workflow], request)
+        except Exception:
+            errors[workflow] = errors.get(workflow, 0) + 1
+        now = time.perf_counter()
+        done_at.append(now - start)
+        latency = now - (start + scheduled)
+        hists.setdefault(workflow, Histogram()).record(latency * 1e6)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        offered = 0
+        last = 0.0
+        for scheduled, workflow in arrivals:
+            delay = start + scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            pending.append(asyncio.ensure_future(one(scheduled, workflow, synth_request(workflow, rng))))
+            offered += 1
+            last = scheduled
+        await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - start
+
+    total = Histogram()
+    report: Dict[str, Any] = {"workflows": {}}
+    for workflow, h in sorted(hists.items()):
+        for i, c in h.counts.items():
+            total.counts[i] = total.counts.get(i, 0) + c
+        total.count += h.count
+        total.total += h.total
+        total.max = max(total.max, h.max)
+        report["workflows"][workflow] = {**_latency(h), "errors": errors.get(workflow, 0)}
+    report.update({
+        "offered": offered,
+        "offered_rate": offered / last if last else 0.0,
+        "completed": total.count,
+        # completions while arrivals were still coming in; the drain tail is excluded
+        "throughput": sum(1 for t in done_at if t <= last) / last if last else 0.0,
+        "elapsed_s": elapsed,
+        **_latency(total),
+    })
+    return report
+
+
+def _latency(h: Histogram) -> Dict[str, float]:
+    return {
+        "count": h.count,
+        "p50_ms": h.quantile(0.5) / 1000,
+        "p99_ms": h.quantile(0.99) / 1000,
+        "p999_ms": h.quantile(0.999) / 1000,
+        "max_ms": h.max / 1000,
+    }
+
+
+def find_saturation(
+    handlers: Dict[str, Callable],
+    rates: List[float],
+    duration_s: float,
+    mix: Dict[str, float],
+    p99_slo_ms: float,
+    workers: int = 32,
+) -> Dict[str, Any]:
+    """Step the offered rate up until throughput falls behind or p99 breaks the SLO."""
+    steps = []
+    saturation = 0.0
+    for rate in rates:
+        report = asyncio.run(drive(poisson_arrivals(rate, duration_s, mix), handlers, workers))
+        keeping_up = report["throughput"] >= 0.9 * report["offered_rate"] and report["p99_ms"] <= p99_slo_ms
+        steps.append({"rate": rate, "throughput": report["throughput"], "p99_ms": report["p99_ms"], "ok": keeping_up})
+        sys.stderr.write(f"rate {rate:>7.1f}/s -> {report['throughput']:>7.1f}/s, p99 {report['p99_ms']:>9.1f} ms"
+                         f"{'' if keeping_up else '  <- saturated'}\n")
+        if not keeping_up:
+            break
+        saturation = report["throughput"]
+    return {"saturation_throughput": saturation, "steps": steps}
+
+
+# running the main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the restaurant workflows")
+    parser.add_argument("--rate", type=float, default=50, help="mean arrivals per second (Poisson)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of arrivals")
+    parser.add_argument("--trace", help="JSON-lines arrival trace to replay instead of Poisson")
+    parser.add_argument("--speedup", type=float, default=1.0, help="replay the trace this many times faster")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help='e.g. \'{"order": 1}\'')
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--saturate", action="store_true", help="ramp the rate to find saturation throughput")
+    parser.add_argument("--slo-ms", type=float, default=2000)
+    parser.add_argument("--sleep-scale", type=float, default=None,
+                        help="scale the simulated oven/heartbeat sleeps (SIM_SLEEP_SCALE); 0 skips them")
+    parser.add_argument("--fast", action="store_true", help="same as --sleep-scale 0")
+    args = parser.parse_args()
+
+    import console
+    import simtime
+
+    if args.fast:
+        simtime.set_scale(0)
+    elif args.sleep_scale is not None:
+        simtime.set_scale(args.sleep_scale)
+    with console.quiet():
+        handlers = entry_points()
+        if args.saturate:
+            rates = [args.rate * 2 ** i for i in range(8)]
+            result: Optional[Dict[str, Any]] = find_saturation(handlers, rates, args.duration, args.mix, args.slo_ms, args.workers)
+        else:
+            arrivals = recorded_arrivals(args.trace, args.speedup) if args.trace else poisson_arrivals(args.rate, args.duration, args.mix)
+            result = asyncio.run(drive(arrivals, handlers, args.workers))
+
+        # the bakes' Gemini summaries land after their responses; wait for them before reporting
+        import baker
+        baker.summaries.flush(timeout=30)
+    if result is not None:
+        result["bake_summaries"] = {"summarized": baker.summaries.jobs_summarized,
+                                    "failed": baker.summaries.jobs_failed}
+    print(json.dumps(result, indent=2))
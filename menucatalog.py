@@ -0,0 +1,148 @@
+import json
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# parallel: portions cook unattended side by side (oven, fryer), so the
+# station is busy for the longest one; otherwise a cook makes them one
+# after another and the station's time is their sum
+MENU = [
+    {"name": "margherita pizza", "station": "oven", "prep_min": 9, "parallel": True},
+    {"name": "garlic bread", "station": "oven", "prep_min": 6, "parallel": True},
+    {"name": "caesar salad", "station": "cold", "prep_min": 4, "parallel": False},
+    {"name": "tiramisu", "station": "pastry", "prep_min": 2, "parallel": False},
+    {"name": "pasta primavera", "station": "saute", "prep_min": 11, "parallel": False},
+    {"name": "steak frites", "station": "grill", "prep_min": 14, "parallel": False},
+    {"name": "fries", "station": "fryer", "prep_min": 5, "parallel": True},
+]
+DEFAULT_STATION = "kitchen"
+DEFAULT_PREP_MIN = 10  # anything not on the menu is made by hand
+MIN_PREP_MIN = 2  # ticket in and plated: even an order with nothing to cook takes this long
+HANDOFF_MIN = {"dine_in": 0, "takeout": 2, "delivery": 3}  # packing and handover after the food is ready
+
+
+class PrepEstimate(NamedTuple):
+    minutes: int
+    bottleneck: str  # the station on the critical path
+    unknown: int     # items not found in the catalog
+
+
+# Catalog
+
+class MenuCatalog:
+    """Menu items indexed by name, each mapped to a station slot, prep time and parallelism.
+
+    An order's prep time is its critical path: stations work at the same
+    time, so it is the busiest station's time. estimate() makes one pass
+    over the items into per-station accumulators, so it is O(items) plus a
+    constant for the handful of stations.
+    """
+
+    def __init__(self, menu: Iterable[Dict] = MENU):
+        self.stations: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._index: Dict[str, tuple] = {}
+        for entry in menu:
+            self.add(entry["name"], entry["station"], entry["prep_min"], entry.get("parallel", False))
+        self._default = (self._slot(DEFAULT_STATION), float(DEFAULT_PREP_MIN), False)
+
+    def _slot(self, station: str) -> int:
+        slot = self._slots.get(station)
+        if slot is None:
+            slot = self._slots[station] = len(self.stations)
+            self.stations.append(station)
+        return slot
+
+    def add(self, name: str, station: str, prep_min: float, parallel: bool = False):
+        self._index[name.strip().lower()] = (self._slot(station), float(prep_min), bool(parallel))
+
+    def lookup(self, item: str) -> Optional[tuple]:
+        """(station slot, prep minutes, parallel) for item, or None when it isn't on the menu."""
+        hit = self._index.get(item)
+        if hit is None:
+            hit = self._index.get(item.strip().lower())
+        return hit
+
+    def estimate(self, items: Iterable[str], handoff_min: float = 0) -> PrepEstimate:
+        n = len(self.stations)
+        serial = [0.0] * n
+        longest = [0.0] * n
+        index = self._index
+        unknown = 0
+        for item in items:
+            hit = index.get(item)
+            if hit is None:
+                hit = index.get(item.strip().lower())
+                if hit is None:
+                    hit = self._default
+                    unknown += 1
+            slot, minutes, parallel = hit
+            if parallel:
+                if minutes > longest[slot]:
+                    longest[slot] = minutes
+            else:
+                serial[slot] += minutes
+        best, bottleneck = 0.0, ""
+        for slot in range(n):
+            busy = serial[slot] if serial[slot] > longest[slot] else longest[slot]
+            if busy > best:
+                best, bottleneck = busy, self.stations[slot]
+        if best < MIN_PREP_MIN:
+            best = MIN_PREP_MIN
+        return PrepEstimate(math.ceil(best + handoff_min), bottleneck, unknown)
+
+
+_default: Optional[MenuCatalog] = None
+_default_lock = threading.Lock()
+
+
+def default_catalog() -> MenuCatalog:
+    """Process-wide catalog from the JSON list at MENU_CATALOG, or the built-in MENU."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                path = os.getenv("MENU_CATALOG")
+                if path:
+                    with open(path) as f:
+                        _default = MenuCatalog(json.load(f))
+                else:
+                    _default = MenuCatalog()
+    return _default
+
+
+def _item_names(items) -> List[str]:
+    """A bare string is one item; a non-string entry becomes "", which is counted as unknown."""
+    if items is None:
+        return []
+    if isinstance(items, str):
+        return [items]
+    return [item if isinstance(item, str) else "" for item in items]
+
+
+def prep_eta(items: Iterable[str], route: str) -> PrepEstimate:
+    """Prep estimate for an order's items, including the route's handoff time."""
+    return default_catalog().estimate(_item_names(items), HANDOFF_MIN.get(route, 0))
+
+
+# running the main
+if __name__ == "__main__":
+    import random
+    import time
+
+    catalog = default_catalog()
+    rng = random.Random(0)
+    names = [m["name"] for m in MENU]
+    for size in (1, 4, 12, 40):
+        orders = [[rng.choice(names) for _ in range(size)] for _ in range(2000)]
+        start = time.perf_counter()
+        for _ in range(10):
+            for items in orders:
+                catalog.estimate(items)
+        us = (time.perf_counter() - start) / (10 * len(orders)) * 1e6
+        print(f"{size:>3} items: {us:.2f} us/estimate, e.g. {catalog.estimate(orders[0])}")
+    for route, items in [("dine_in", []), ("dine_in", "tiramisu"), ("dine_in", ["tiramisu", 3]),
+                         ("takeout", ["margherita pizza", "garlic bread", "fries"]),
+                         ("delivery", ["steak frites", "steak frites", "caesar salad", "Lobster Roll"])]:
+        print(route, items, "->", prep_eta(items, route))
@@ -1,17 +1,9 @@
-from langgraph.graph import StateGraph, START, END
 from typing_extensions import TypedDict
 from typing import Dict, Any
+from contextvars import ContextVar
 import json
-import os
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-
-load_dotenv()
-
-
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")  
+import breaker
+from llmclient import complete, parse_json
 
 # State
 class CateringState(TypedDict, total=False):
@@ -25,6 +17,10 @@ class CateringState(TypedDict, total=False):
     status: str
     reason: str
 
+# who approves quotes at the manager gate: None asks on the console; the HTTP
+# service sets a callable(state) -> bool that waits for the approval API call
+approver: ContextVar = ContextVar("catering_approver", default=None)
+
 # Fucntions
 def capture_request(state: Dict) -> Dict:
     return {
@@ -86,33 +82,48 @@ def draft_high(state: Dict) -> Dict:
     print(f"High draft: {quote}")
     return {"quote": quote}
 
+def templated_reason(state: Dict, status: str) -> str:
+    """Reason used when Gemini can't be reached."""
+    quote = state.get("quote", {})
+    if status == "approved":
+        return (f"Approved: {state.get('headcount')} guests at ${quote.get('per_person')}/person, "
+                f"total ${quote.get('total')}, ready {quote.get('ready_time')}.")
+    return f"Manager requested changes to the {state.get('headcount')}-guest quote."
+
+def parse_reason(text: str) -> str:
+    return parse_json(text)["reason"]
+
 def manager_gate(state: Dict) -> Dict:
     """Manual manager approval with Gemini-generated reason"""
     quote = state.get("quote", {})
     if not quote:
         return {"status": "needs_revision", "reason": "infeasible request"}
 
-    print("\nQuote for approval:")
-    print(json.dumps(quote, indent=2))
+    approve = approver.get()
+    if approve is None:
+        print("\nQuote for approval:")
+        print(json.dumps(quote, indent=2))
 
     while True:
-        ans = input("Approve quote? (yes/no): ").strip().lower()
+        if approve is not None:
+            ans = "yes" if approve(state) else "no"
+        else:
+            ans = input("Approve quote? (yes/no): ").strip().lower()
         if ans in ("yes", "y", "no", "n"):
-            prompt_template = ChatPromptTemplate.from_template("""
+            prompt = """
             You are a manager reviewing this catering request:
             {request}
             Decision: {decision}
             Generate a short reason explaining the decision.
             Respond JSON as {{"reason": "<short reason>"}}
-            """)
-            parser = JsonOutputParser()
-            chain = prompt_template | llm | parser
-            response = chain.invoke({
-                "request": json.dumps(state),
-                "decision": ans
-            })
+            """.format(request=json.dumps(state), decision=ans)
             status = "approved" if ans in ("yes","y") else "needs_revision"
-            return {"status": status, "reason": response["reason"]}
+            reason = breaker.guard(
+                "manager_gate",
+                lambda: parse_reason(complete(prompt, site="manager_gate", check=parse_reason)),
+                lambda: templated_reason(state, status),
+            )
+            return {"status": status, "reason": reason}
         print("Please enter yes or no.")
 
 def finalize_approved(state: Dict) -> Dict:
@@ -123,18 +134,23 @@ def finalize_rejected(state: Dict) -> Dict:
 
 # Graph construction
 def build_graph():
-    graph = StateGraph(CateringState)
+    from langgraph.graph import StateGraph, START, END
+    from graphmetrics import node_adder
+    from eventlog import logged_graph, logged_nodes
 
-    graph.add_node("capture_request", capture_request)
-    graph.add_node("determine_complexity", determine_complexity)
-    graph.add_node("check_capacity", check_capacity)
-    graph.add_node("check_ingredients", check_ingredients)
-    graph.add_node("draft_low", draft_low)
-    graph.add_node("draft_medium", draft_medium)
-    graph.add_node("draft_high", draft_high)
-    graph.add_node("manager_gate", manager_gate)
-    graph.add_node("finalize_approved", finalize_approved)
-    graph.add_node("finalize_rejected", finalize_rejected)
+    graph = StateGraph(CateringState)
+    add_node = logged_nodes(node_adder(graph, "catering"), "catering")
+
+    add_node("capture_request", capture_request)
+    add_node("determine_complexity", determine_complexity)
+    add_node("check_capacity", check_capacity)
+    add_node("check_ingredients", check_ingredients)
+    add_node("draft_low", draft_low)
+    add_node("draft_medium", draft_medium)
+    add_node("draft_high", draft_high)
+    add_node("manager_gate", manager_gate)
+    add_node("finalize_approved", finalize_approved)
+    add_node("finalize_rejected", finalize_rejected)
 
     graph.add_edge(START, "capture_request")
     graph.add_edge("capture_request", "determine_complexity")
@@ -170,7 +186,7 @@ def build_graph():
     graph.add_edge("finalize_approved", END)
     graph.add_edge("finalize_rejected", END)
 
-    return graph.compile()
+    return logged_graph(graph.compile(), "catering")
 
 # running the main
 if __name__ == "__main__":
@@ -1,16 +1,9 @@
-from langgraph.graph import StateGraph, START, END
 from typing import TypedDict, List
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.messages import SystemMessage, HumanMessage
 import json
-import os
-from dotenv import load_dotenv
-
-#loading .env
-load_dotenv()
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+import breaker
+import task3
+from llmclient import complete, parse_json
+from menucatalog import prep_eta
 
 # State
 class OrderState(TypedDict, total=False):
@@ -34,9 +27,7 @@ def intake_order(state: OrderState) -> OrderState:
         requested_time=state.get("requested_time", "")
     )
 
-def route_order(state: OrderState) -> OrderState:
-    """Use Gemini LLM to decide the routing based on order_type."""
-    prompt = ChatPromptTemplate.from_template("""
+ROUTE_PROMPT = """
         You are an order router. The order has the following info:
         {order_json}
 
@@ -48,56 +39,81 @@ def route_order(state: OrderState) -> OrderState:
 
         Respond ONLY in JSON:
         {{"route": "<dine_in|takeout|delivery|unsupported>"}}
-    """)
-    parser = JsonOutputParser()
-    chain = prompt | llm | parser
+    """
+
+ROUTES = ("dine_in", "takeout", "delivery", "unsupported")
+
+def fallback_route(state: OrderState) -> str:
+    """Deterministic routing from task3.router, used while Gemini is unavailable."""
+    summary = task3.router(state)
+    return summary["route"] if isinstance(summary, dict) else "unsupported"
+
+def parse_route(text: str) -> str:
+    """Route from a route_order answer; ValueError unless it is one of ROUTES."""
+    route = parse_json(text).get("route")
+    if route not in ROUTES:
+        raise ValueError(f"unexpected route {route!r}")
+    return route
+
+def route_order(state: OrderState) -> OrderState:
+    """Use Gemini LLM to decide the routing based on order_type.
+
+    Errors, unknown routes and an open route_order circuit fall back to
+    task3.router so orders keep flowing.
+    """
+    def ask_llm() -> str:
+        # the route only depends on order_type, so that is all the prompt
+        # carries: every order of a type shares one cache entry, and a herd
+        # of them (e.g. an unknown type) shares one call
+        prompt = ROUTE_PROMPT.format(order_json=json.dumps({"order_type": state.get("order_type")}))
+        return parse_route(complete(prompt, site="route_order", check=parse_route,
+                                    flight_key=state.get("order_type")))
 
-    response = chain.invoke({"order_json": json.dumps(state)})
-    state["route"] = response.get("route")
-    return state
+    return {"route": breaker.guard("route_order", ask_llm, lambda: fallback_route(state))}
 
 
 def handle_dine_in(state: OrderState) -> OrderState:
     """Dine-in path."""
     table_num = 7
-    state.update({
-        "prep_eta_min": 5,
+    return {
+        "prep_eta_min": prep_eta(state.get("items", []), "dine_in").minutes,
         "notes": f"Table {table_num} ready, notify host"
-    })
-    return state
+    }
 
 def handle_takeout(state: OrderState) -> OrderState:
     """Takeout path."""
-    state.update({
-        "prep_eta_min": 12,
+    return {
+        "prep_eta_min": prep_eta(state.get("items", []), "takeout").minutes,
         "notes": "Pickup label printed"
-    })
-    return state
+    }
 
 def handle_delivery(state: OrderState) -> OrderState:
     """Delivery path."""
-    state.update({
-        "prep_eta_min": 18,
+    return {
+        "prep_eta_min": prep_eta(state.get("items", []), "delivery").minutes,
         "courier_eta_min": 22,
         "notes": "Assigned to Driver-07"
-    })
-    return state
+    }
 
 def handle_unsupported(state: OrderState) -> OrderState:
-    state["notes"] = f"Unsupported order type: {state.get('order_type')}"
-    return state
+    return {"notes": f"Unsupported order type: {state.get('order_type')}"}
 
 # graph construction
 def build_order_graph():
+    from langgraph.graph import StateGraph, START, END
+    from graphmetrics import node_adder
+    from eventlog import logged_graph, logged_nodes
+
     graph = StateGraph(OrderState)
+    add_node = logged_nodes(node_adder(graph, "order"), "order")
 
     
-    graph.add_node("intake_order", intake_order)
-    graph.add_node("route_order", route_order)
-    graph.add_node("dine_in", handle_dine_in)
-    graph.add_node("takeout", handle_takeout)
-    graph.add_node("delivery", handle_delivery)
-    graph.add_node("unsupported", handle_unsupported)
+    add_node("intake_order", intake_order)
+    add_node("route_order", route_order)
+    add_node("dine_in", handle_dine_in)
+    add_node("takeout", handle_takeout)
+    add_node("delivery", handle_delivery)
+    add_node("unsupported", handle_unsupported)
 
     
     graph.add_edge(START, "intake_order")
@@ -121,7 +137,7 @@ def build_order_graph():
     graph.add_edge("delivery", END)
     graph.add_edge("unsupported", END)
 
-    return graph.compile()
+    return logged_graph(graph.compile(), "order")
 
 # running the main
 if __name__ == "__main__":
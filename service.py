@@ -0,0 +1,504 @@
+import asyncio
+import contextvars
+import dataclasses
+import json
+import os
+import secrets
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+PORT = int(os.getenv("SERVICE_PORT", "8080"))
+KEEPALIVE_S = float(os.getenv("SERVICE_KEEPALIVE_S", "75"))
+APPROVAL_TIMEOUT_S = float(os.getenv("CATERING_APPROVAL_TIMEOUT_S", "3600"))
+MAX_PENDING_APPROVALS = int(os.getenv("CATERING_MAX_PENDING", "64"))
+MAX_BODY = 1 << 20
+KEEP_FINISHED = 1000  # finished catering tickets and bake summaries kept for GET
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 411: "Length Required", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _default(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) or hasattr(obj, "model_dump"):
+        from compactstate import as_dict
+        return as_dict(obj)
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), default=_default).encode()
+
+
+# Request bodies the workflows accept; /bake is checked against baker.BakeState
+
+class OrderRequest(BaseModel):
+    order_type: str
+    items: List[str]
+    address: str = ""
+    requested_time: str = ""
+
+
+class CateringRequest(BaseModel):
+    event_date: str
+    headcount: int
+    menu: List[str]
+
+
+class SnapshotRequest(BaseModel):
+    service_area: str
+
+
+# HTTP/1.1 plumbing
+
+@dataclasses.dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes
+    keep_alive: bool
+
+    def json(self, model: Optional[Type[BaseModel]] = None) -> Dict[str, Any]:
+        """The body as a dict; with model, its fields are checked and coerced and any extras kept."""
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body is not JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        if model is None:
+            return data
+        try:
+            checked = model.model_validate(data)
+        except ValidationError as e:
+            raise HTTPError(400, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+        return {**data, **checked.model_dump(exclude_unset=True)}
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """Next request on a keep-alive connection, or None once the client has closed it."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HTTPError(400, "truncated request")
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431, "headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "bad request line")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", ""):
+        raise HTTPError(411, "send a Content-Length body")
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY:
+        raise HTTPError(413, "body too large")
+    body = await reader.readexactly(length) if length else b""
+    path, _, qs = target.partition("?")
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return Request(method.upper(), path, dict(urllib.parse.parse_qsl(qs)), headers, body, keep_alive)
+
+
+def _head(status: int, keep_alive: bool, extra: str) -> bytes:
+    return (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n{extra}\r\n").encode()
+
+
+def json_response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    body = dumps(payload)
+    return _head(status, keep_alive, f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n") + body
+
+
+def _chunk(item: Any) -> bytes:
+    line = dumps(item) + b"\n"
+    return b"%x\r\n%s\r\n" % (len(line), line)
+
+
+async def write_stream(writer: asyncio.StreamWriter, items: AsyncIterator[Any], keep_alive: bool):
+    """NDJSON, one chunk per item, flushed as each item arrives."""
+    writer.write(_head(200, keep_alive, "Content-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n"))
+    async for item in items:
+        writer.write(_chunk(item))
+        await writer.drain()
+    writer.write(b"0\r\n\r\n")
+
+
+def end_stream_with_error(writer: asyncio.StreamWriter, error: BaseException):
+    """Finish a stream whose 200 is already out: a last {"error": ...} item, then the final chunk."""
+    writer.write(_chunk({"error": f"{type(error).__name__}: {error}"}) + b"0\r\n\r\n")
+
+
+# Catering approvals
+
+class Ticket:
+    """One catering request parked at the manager gate until the approval call."""
+
+    def __init__(self, ticket_id: str, loop: asyncio.AbstractEventLoop):
+        self.id = ticket_id
+        self.status = "running"
+        self.quote: Optional[Dict[str, Any]] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.decision: Future = Future()
+        self.gated = asyncio.Event()
+        self.task: Optional[asyncio.Future] = None
+        self._loop = loop
+
+    def wait(self, state: Dict[str, Any]) -> bool:
+        """orchas.approver for this request; runs on the graph's worker thread."""
+        self.quote = state.get("quote")
+        self.status = "pending_approval"
+        self._loop.call_soon_threadsafe(self.gated.set)
+        try:
+            return self.decision.result(timeout=APPROVAL_TIMEOUT_S)
+        except TimeoutError:
+            return False  # nobody answered: the quote goes back for revision
+
+    def view(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"id": self.id, "status": self.status, "quote": self.quote}
+        if self.result is not None:
+            out["result"] = self.result
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+class CateringDesk:
+    """Runs orchas' graph with approval handed to the API instead of input().
+
+    Each request holds a thread while it waits at the gate, so at most
+    max_pending can be open at once.
+    """
+
+    def __init__(self, app, max_pending: int = MAX_PENDING_APPROVALS):
+        self._app = app
+        self._pool = ThreadPoolExecutor(max_workers=max_pending, thread_name_prefix="catering")
+        self.max_pending = max_pending
+        self.tickets: "OrderedDict[str, Ticket]" = OrderedDict()
+        self.open = 0
+
+    async def start(self, request: Dict[str, Any]) -> Ticket:
+        import orchas
+
+        if self.open >= self.max_pending:
+            raise HTTPError(503, "too many catering requests awaiting approval")
+        loop = asyncio.get_running_loop()
+        ticket = Ticket(secrets.token_hex(8), loop)
+        self.tickets[ticket.id] = ticket
+        self.open += 1
+        ctx = contextvars.copy_context()
+        ctx.run(orchas.approver.set, ticket.wait)
+        ticket.task = loop.run_in_executor(self._pool, ctx.run, self._app.invoke, request)
+        ticket.task.add_done_callback(lambda f: self._finished(ticket, f))
+        gated = asyncio.ensure_future(ticket.gated.wait())
+        await asyncio.wait([ticket.task, gated], return_when=asyncio.FIRST_COMPLETED)
+        gated.cancel()
+        return ticket
+
+    def _finished(self, ticket: Ticket, task: asyncio.Future):
+        self.open -= 1
+        if task.exception() is not None:
+            ticket.status, ticket.error = "failed", f"{type(task.exception()).__name__}: {task.exception()}"
+        else:
+            ticket.result = task.result()
+            ticket.status = ticket.result.get("status", "done")
+        done = [t for t, v in self.tickets.items() if v.task is not None and v.task.done()]
+        for ticket_id in done[:max(0, len(done) - KEEP_FINISHED)]:
+            del self.tickets[ticket_id]
+
+    def get(self, ticket_id: str) -> Ticket:
+        ticket = self.tickets.get(ticket_id)
+        if ticket is None:
+            raise HTTPError(404, f"no catering request {ticket_id}")
+        return ticket
+
+    async def decide(self, ticket_id: str, approve: bool) -> Ticket:
+        ticket = self.get(ticket_id)
+        if ticket.status != "pending_approval" or ticket.decision.done():
+            raise HTTPError(409, f"catering request {ticket_id} is {ticket.status}")
+        ticket.decision.set_result(approve)
+        await ticket.task
+        return ticket
+
+
+# Service
+
+def _keep(finished: "OrderedDict[str, Any]", key: str, value: Any):
+    finished[key] = value
+    while len(finished) > KEEP_FINISHED:
+        finished.popitem(last=False)
+
+
+Route = Tuple[str, Tuple[str, ...]]
+
+
+class Service:
+    """The four workflows behind one asyncio HTTP/1.1 server.
+
+    Graphs come from graphregistry and the LLM client is created once, when
+    the service starts, so requests only pay for the workflow itself. Add
+    ?stream=1 to /orders or /bake for one NDJSON line per node update. With
+    shards > 0, order routing and bake supervision run on a ShardPool and
+    this process only does the I/O.
+
+        GET  /health
+        POST /snapshot              {"service_area": ...}
+        POST /orders                order request
+        POST /bake                  {"item", "target_temp_c", "batch_size"}
+        GET  /bake/summaries/{id}   the Gemini summary for a bake's summary_id
+        POST /catering              catering request -> quote awaiting approval
+        GET  /catering/{id}
+        POST /catering/{id}/approval {"approve": true | false}
+    """
+
+    def __init__(self, shards: int = 0, threads: int = 8):
+        import graphregistry
+        from llmclient import get_llm
+
+        self.order_app = graphregistry.get("order")
+        self.bake_app = graphregistry.get("bake")
+        self.catering = CateringDesk(graphregistry.get("catering"))
+        get_llm()
+        self.bake_summaries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._summary_items: "OrderedDict[str, str]" = OrderedDict()  # summary id -> bake item, for the shard
+        self.pool = None
+        if shards:
+            from shardpool import ShardPool
+            self.pool = ShardPool(shards, threads)
+        self.routes: Dict[Route, Callable] = {
+            ("GET", ("health",)): self.health,
+            ("POST", ("snapshot",)): self.snapshot,
+            ("POST", ("orders",)): self.orders,
+            ("POST", ("bake",)): self.bake,
+            ("GET", ("bake", "summaries", "{id}")): self.bake_summary,
+            ("POST", ("catering",)): self.catering_start,
+            ("GET", ("catering", "{id}")): self.catering_get,
+            ("POST", ("catering", "{id}", "approval")): self.catering_approval,
+        }
+        self.connections = 0
+        self.in_flight = 0
+        self.served: Dict[str, int] = {}
+        self.errors = 0
+        self.started = time.time()
+
+    def _match(self, req: Request) -> Tuple[Callable, List[str]]:
+        parts = tuple(p for p in req.path.split("/") if p)
+        allowed = False
+        for (method, pattern), handler in self.routes.items():
+            if len(pattern) != len(parts) or any(p != q and not p.startswith("{") for p, q in zip(pattern, parts)):
+                continue
+            if method == req.method:
+                return handler, [q for p, q in zip(pattern, parts) if p.startswith("{")]
+            allowed = True
+        raise HTTPError(405 if allowed else 404, f"{req.method} {req.path}")
+
+    # Handlers: a dict is sent as JSON, an async iterator is streamed
+
+    async def health(self, req: Request):
+        out = {"uptime_s": time.time() - self.started, "connections": self.connections, "in_flight": self.in_flight,
+               "served": self.served, "errors": self.errors, "catering_awaiting_approval": self.catering.open}
+        if self.pool is not None:
+            out["shards"] = self.pool.health()
+        return out
+
+    async def snapshot(self, req: Request):
+        from taskonep import dinner_rush_snapshot
+        return await dinner_rush_snapshot(req.json(SnapshotRequest)["service_area"])
+
+    async def _graph(self, req: Request, app, workflow: str, model: Type[BaseModel],
+                     prepare: Callable = lambda data: data):
+        from eventlog import run
+
+        data = req.json(model)
+        if req.query.get("stream") == "1":
+            return self._stream(app, prepare(data))
+        if self.pool is not None:
+            return await self.pool.asubmit(workflow, data)
+        with run():
+            return await app.ainvoke(prepare(data))
+
+    async def _stream(self, app, state: Any) -> AsyncIterator[Dict[str, Any]]:
+        from eventlog import run
+
+        final = None
+        with run():
+            async for mode, chunk in app.astream(state, stream_mode=["updates", "values"]):
+                if mode == "updates":
+                    for node, update in chunk.items():
+                        yield {"node": node, "update": update}
+                else:
+                    final = chunk
+        yield {"result": final}
+
+    async def orders(self, req: Request):
+        return await self._graph(req, self.order_app, "order", OrderRequest)
+
+    async def bake(self, req: Request):
+        import baker
+        from compactstate import validated
+        result = await self._graph(req, self.bake_app, "bake", baker.BakeState,
+                                   lambda data: validated(baker.BakeState, data))
+        if self.pool is not None and isinstance(result, dict) and result.get("summary_id"):
+            _keep(self._summary_items, result["summary_id"], result["item"])
+        return result
+
+    async def bake_summary(self, req: Request, summary_id: str):
+        """Status and text of the summary that replaces a bake's templated reason.
+
+        The queue hands a finished summary out once, so it is kept here for
+        later GETs. With shards, it is asked of the shard that ran the bake.
+        """
+        import baker
+
+        found = self.bake_summaries.get(summary_id)
+        if found is not None:
+            return found
+        if self.pool is None:
+            found = baker.summary_status(summary_id)
+        elif summary_id in self._summary_items:
+            found = await self.pool.asubmit("bake_summary", {"summary_id": summary_id,
+                                                             "item": self._summary_items[summary_id]})
+        else:
+            found = {"status": "unknown"}
+        if found["status"] == "unknown":
+            raise HTTPError(404, f"no bake summary {summary_id}")
+        if found["status"] != "pending":
+            _keep(self.bake_summaries, summary_id, found)
+        return found
+
+    async def catering_start(self, req: Request):
+        ticket = await self.catering.start(req.json(CateringRequest))
+        return 201, ticket.view()
+
+    async def catering_get(self, req: Request, ticket_id: str):
+        return self.catering.get(ticket_id).view()
+
+    async def catering_approval(self, req: Request, ticket_id: str):
+        approve = req.json().get("approve")
+        if not isinstance(approve, bool):
+            raise HTTPError(400, 'send {"approve": true} or {"approve": false}')
+        return (await self.catering.decide(ticket_id, approve)).view()
+
+    # Connections
+
+    async def _respond(self, req: Request, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; False when the connection must not be reused."""
+        self.in_flight += 1
+        streaming = False
+        try:
+            handler, args = self._match(req)
+            result = await handler(req, *args)
+            status = 200
+            if isinstance(result, tuple):
+                status, result = result
+            if hasattr(result, "__aiter__"):
+                streaming = True
+                await write_stream(writer, result, req.keep_alive)
+            else:
+                writer.write(json_response(status, result, req.keep_alive))
+            self.served[handler.__name__] = self.served.get(handler.__name__, 0) + 1
+        except Exception as e:
+            self.errors += 1
+            if streaming:
+                # the status line is gone: end the body with the error and drop the connection
+                end_stream_with_error(writer, e)
+                return False
+            if isinstance(e, HTTPError):
+                writer.write(json_response(e.status, {"error": str(e)}, req.keep_alive))
+            else:
+                from shardpool import ShardError
+                status = 502 if isinstance(e, ShardError) else 500
+                writer.write(json_response(status, {"error": f"{type(e).__name__}: {e}"}, req.keep_alive))
+        finally:
+            self.in_flight -= 1
+            await writer.drain()
+        return req.keep_alive
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    req = await asyncio.wait_for(read_request(reader), KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    break
+                except HTTPError as e:
+                    writer.write(json_response(e.status, {"error": str(e)}, False))
+                    await writer.drain()
+                    break
+                if req is None:
+                    break
+                if not await self._respond(req, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT, ready: Optional[Callable[[int], None]] = None):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+
+# running the main
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+    import sys
+
+    import console
+    import simtime
+
+    parser = argparse.ArgumentParser(description="HTTP service for the restaurant workflows")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT, help="0 picks a free port")
+    parser.add_argument("--shards", type=int, default=0, help="worker processes for orders and bakes")
+    parser.add_argument("--quiet", action="store_true", help="silence the workflows' console output")
+    parser.add_argument("--sleep-scale", type=float, default=None,
+                        help="scale the simulated oven/heartbeat sleeps (SIM_SLEEP_SCALE); 0 skips them")
+    parser.add_argument("--fast", action="store_true", help="same as --sleep-scale 0")
+    args = parser.parse_args()
+
+    if args.fast:
+        simtime.set_scale(0)
+    elif args.sleep_scale is not None:
+        simtime.set_scale(args.sleep_scale)
+    announce = lambda port: sys.stderr.write(f"listening on http://{args.host}:{port}\n") or sys.stderr.flush()
+    with console.quiet() if args.quiet else contextlib.nullcontext():
+        service = Service(shards=args.shards)
+        try:
+            asyncio.run(service.serve(args.host, args.port, announce))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
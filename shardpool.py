@@ -0,0 +1,371 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import graphregistry
+
+# workflow -> request fields tried in order for the shard key
+SHARD_KEYS: Dict[str, tuple] = {
+    "order": ("order_id", "address"),
+    "snapshot": ("service_area",),
+    "bake": ("item",),
+    "bake_summary": ("item",),  # asked of the shard that ran the bake
+}
+GRAPHS = ["order", "dinner", "bake"]  # preloaded in the parent, shared copy-on-write
+
+_ctx = multiprocessing.get_context("fork")  # workers inherit the preloaded graphs
+# restarts happen on a reader thread while other threads run, where fork is
+# unsafe: a restarted shard starts a fresh interpreter and compiles its own graphs
+_restart_ctx = multiprocessing.get_context(os.getenv("SHARD_RESTART", "spawn"))
+
+
+class ShardError(RuntimeError):
+    pass
+
+
+# Worker side
+
+def quote(request: Dict[str, Any]) -> Dict[str, Any]:
+    """tasktwoo's pipeline up to the drafted quote, without the manager gate."""
+    import tasktwoo
+
+    state: Dict[str, Any] = {}
+    source = tasktwoo.capture_request.args_schema.model_validate(request).__dict__
+    for tool, keys in tasktwoo.PIPELINE[:4]:
+        src = state or source
+        state.update(tool.func(*[src[k] for k in keys]))
+    return state
+
+
+def handlers() -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    import baker
+    import dinnersanpshot
+    from compactstate import validated
+    from eventlog import scoped
+
+    order_app = graphregistry.get("order")
+    dinner_app = graphregistry.get("dinner")
+    bake_app = graphregistry.get("bake")
+    return {
+        "order": scoped(order_app.invoke),
+        "snapshot": scoped(lambda req: dinner_app.invoke(validated(dinnersanpshot.RestaurantState, req))),
+        "bake": scoped(lambda req: bake_app.invoke(validated(baker.BakeState, req))),
+        "bake_summary": lambda req: baker.summary_status(req["summary_id"]),
+        "quote": quote,
+    }
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return -1
+
+
+def _worker_main(shard: int, conn, threads: int, heartbeat_s: float):
+    """One shard: requests come in batches over conn, results go back in batches."""
+    import llmcache
+    import cassette
+
+    graphregistry.preload(GRAPHS)  # already compiled when forked, not when spawned
+    # open this shard's handles on the shared on-disk caches before the first request
+    llmcache.default_cache()
+    cassette.default_cassette()
+    run = handlers()
+    out: queue.SimpleQueue = queue.SimpleQueue()
+    busy = [0]
+    done = [0]
+
+    def execute(rid: int, workflow: str, request: Dict[str, Any]):
+        busy[0] += 1
+        try:
+            out.put((rid, True, run[workflow](request)))
+        except BaseException as e:  # the parent's future must always complete
+            out.put((rid, False, f"{type(e).__name__}: {e}"))
+        finally:
+            busy[0] -= 1
+            done[0] += 1
+
+    def sender():
+        while True:
+            try:
+                batch = [out.get(timeout=heartbeat_s)]
+            except queue.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(out.get_nowait())
+                except queue.Empty:
+                    break
+            if batch and batch[-1] is None:
+                return
+            health = {"pid": os.getpid(), "busy": busy[0], "done": done[0], "rss_kb": _rss_kb()}
+            conn.send_bytes(pickle.dumps((batch, health), protocol=pickle.HIGHEST_PROTOCOL))
+
+    send_thread = threading.Thread(target=sender, name=f"shard-{shard}-send", daemon=True)
+    send_thread.start()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"shard-{shard}") as pool:
+        while True:
+            try:
+                batch = pickle.loads(conn.recv_bytes())
+            except EOFError:
+                break
+            if batch is None:
+                break
+            for rid, workflow, request in batch:
+                pool.submit(execute, rid, workflow, request)
+    out.put(None)
+    send_thread.join()
+
+
+# Parent side
+
+def _settle(future: Future, ok: bool, value: Any):
+    """Complete future with a shard's answer, unless its caller already cancelled it."""
+    if future.done():
+        return
+    try:
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value if isinstance(value, BaseException) else ShardError(value))
+    except InvalidStateError:
+        pass  # cancelled between the check and the set
+
+
+class _Shard:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.send_lock = threading.Lock()
+        self.pending: Dict[int, Future] = {}
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.restarts = -1
+        self.health: Dict[str, Any] = {}
+        self.seen_at = 0.0
+
+
+class ShardPool:
+    """Requests spread over forked worker processes, one shard per process.
+
+    A request's shard comes from a stable hash of its key (service area,
+    order id or address, ...), so one area's or one order's work always
+    lands on the same process and finds that process's warm state. Graphs
+    are compiled once in the parent (graphregistry.preload) and shared
+    copy-on-write; every shard opens its own handles on the on-disk LLM
+    cache and cassette, and LLM_SCHED_PATH shares the rate budget between
+    them. Requests and results cross each pipe as pickled batches, one
+    message per batch instead of per request. A shard that dies fails its
+    pending futures and is restarted in a fresh interpreter
+    (SHARD_RESTART=spawn, the default), since forking from the reader
+    thread would copy whatever locks other threads held at that moment;
+    like any spawned process it re-imports the main module, which needs
+    an `if __name__ == "__main__"` guard.
+    """
+
+    def __init__(self, shards: Optional[int] = None, threads: int = 8, heartbeat_s: float = 1.0,
+                 restart: bool = True):
+        self.threads = threads
+        self.heartbeat_s = heartbeat_s
+        self.restart = restart
+        self._shards = [_Shard(i) for i in range(shards or os.cpu_count() or 1)]
+        self._ids = 0
+        self._ids_lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._closing = False
+        graphregistry.preload(GRAPHS)
+        for shard in self._shards:
+            self._spawn(shard)
+
+    def _spawn(self, shard: _Shard, ctx=_ctx):
+        parent, child = ctx.Pipe()
+        shard.process = ctx.Process(target=_worker_main, args=(shard.index, child, self.threads, self.heartbeat_s),
+                                     name=f"shard-{shard.index}", daemon=True)
+        shard.process.start()
+        child.close()
+        shard.conn = parent
+        shard.restarts += 1
+        shard.seen_at = time.monotonic()
+        threading.Thread(target=self._read, args=(shard, parent), name=f"shard-{shard.index}-recv",
+                         daemon=True).start()
+
+    def _read(self, shard: _Shard, conn):
+        while True:
+            try:
+                results, health = pickle.loads(conn.recv_bytes())
+            except (EOFError, OSError):
+                break
+            shard.health = health
+            shard.seen_at = time.monotonic()
+            for rid, ok, value in results:
+                future = shard.pending.pop(rid, None)
+                if future is None:
+                    continue
+                shard.completed += 1
+                if not ok:
+                    shard.errors += 1
+                try:
+                    _settle(future, ok, value)
+                except Exception as e:  # one bad result must not stop the shard's reader
+                    _settle(future, False, ShardError(f"could not deliver result: {e}"))
+        if conn is not shard.conn:
+            return
+        for rid in list(shard.pending):
+            future = shard.pending.pop(rid, None)
+            if future is not None:
+                _settle(future, False, f"shard {shard.index} exited")
+        if not self._closing and self.restart:
+            self._spawn(shard, _restart_ctx)
+
+    def shard_for(self, workflow: str, request: Dict[str, Any], key: Any = None) -> int:
+        if key is None:
+            key = next((request[f] for f in SHARD_KEYS.get(workflow, ()) if request.get(f) is not None), None)
+        if key is None:
+            return next(self._round_robin) % len(self._shards)  # nothing to keep together
+        return zlib.crc32(str(key).encode()) % len(self._shards)
+
+    def _send(self, shard: _Shard, batch: List[tuple]):
+        futures = []
+        with self._ids_lock:
+            base = self._ids
+            self._ids += len(batch)
+        message = []
+        for offset, (workflow, request) in enumerate(batch):
+            future: Future = Future()
+            shard.pending[base + offset] = future
+            message.append((base + offset, workflow, request))
+            futures.append(future)
+        shard.submitted += len(batch)
+        try:
+            data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+            with shard.send_lock:
+                shard.conn.send_bytes(data)
+        except Exception as e:
+            for rid, _, _ in message:
+                shard.pending.pop(rid, None)
+            shard.submitted -= len(batch)
+            raise ShardError(f"could not send to shard {shard.index}: {e}") from e
+        return futures
+
+    def submit(self, workflow: str, request: Dict[str, Any], key: Any = None) -> Future:
+        if self._closing:
+            raise ShardError("pool is closed")
+        return self._send(self._shards[self.shard_for(workflow, request, key)], [(workflow, request)])[0]
+
+    async def asubmit(self, workflow: str, request: Dict[str, Any], key: Any = None) -> Any:
+        return await asyncio.wrap_future(self.submit(workflow, request, key))
+
+    def map(self, workflow: str, requests: Iterable[Dict[str, Any]], chunk: int = 256) -> List[Any]:
+        """Results for requests in order; each shard gets its share in batches of chunk."""
+        requests = list(requests)
+        by_shard: Dict[int, List[int]] = {}
+        for i, request in enumerate(requests):
+            by_shard.setdefault(self.shard_for(workflow, request), []).append(i)
+        futures: List[Optional[Future]] = [None] * len(requests)
+        for index, positions in by_shard.items():
+            for start in range(0, len(positions), chunk):
+                part = positions[start:start + chunk]
+                for i, future in zip(part, self._send(self._shards[index], [(workflow, requests[i]) for i in part])):
+                    futures[i] = future
+        return [f.result() for f in futures]
+
+    def health(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        shards = []
+        for s in self._shards:
+            shards.append({
+                "shard": s.index,
+                "pid": s.process.pid,
+                "alive": s.process.is_alive(),
+                "queue_depth": len(s.pending),
+                "busy_threads": s.health.get("busy", 0),
+                "submitted": s.submitted,
+                "completed": s.completed,
+                "errors": s.errors,
+                "restarts": s.restarts,
+                "rss_kb": s.health.get("rss_kb", -1),
+                # a live shard reports at least every heartbeat_s
+                "stale": now - s.seen_at > 3 * self.heartbeat_s,
+            })
+        return {"shards": shards, "queue_depth": sum(s["queue_depth"] for s in shards),
+                "healthy": sum(s["alive"] and not s["stale"] for s in shards)}
+
+    def close(self, timeout: float = 10.0):
+        """Finish what was submitted, then stop every shard."""
+        self._closing = True
+        for s in self._shards:
+            with s.send_lock:
+                try:
+                    s.conn.send_bytes(pickle.dumps(None))
+                except OSError:
+                    pass
+        for s in self._shards:
+            s.process.join(timeout)
+            if s.process.is_alive():
+                s.process.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# running the main
+if __name__ == "__main__":
+    import argparse
+    import json
+    import random
+
+    import console
+
+    # offline, uncached LLM: what's left is the Python work the GIL serializes
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("LLM_CACHE", "0")
+    os.environ.setdefault("SNAPSHOT_STORE", "0")
+
+    parser = argparse.ArgumentParser(description="Bulk order routing and quoting: one process vs a shard pool")
+    parser.add_argument("-n", type=int, default=2000, help="requests per workflow")
+    parser.add_argument("--shards", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    from loadgen import synth_request
+
+    rng = random.Random(0)
+    orders = [{**synth_request("order", rng), "order_id": f"o-{i}"} for i in range(args.n)]
+    quotes = [synth_request("catering", rng) for _ in range(args.n)]
+
+    with console.quiet():
+        graphregistry.preload(GRAPHS)
+        local = handlers()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            start = time.perf_counter()
+            list(pool.map(local["order"], orders))
+            list(pool.map(local["quote"], quotes))
+            single_s = time.perf_counter() - start
+
+        with ShardPool(args.shards, args.threads) as shards:
+            shards.map("order", orders[:args.shards * 4])  # warm every shard
+            start = time.perf_counter()
+            routed = shards.map("order", orders)
+            quoted = shards.map("quote", quotes)
+            sharded_s = time.perf_counter() - start
+            health = shards.health()
+
+    print(json.dumps(health, indent=2))
+    print(f"{2 * args.n} requests: one process {2 * args.n / single_s:,.0f}/s, "
+          f"{args.shards} shards {2 * args.n / sharded_s:,.0f}/s ({single_s / sharded_s:.2f}x)")
+    print("first route:", routed[0].get("route"), "| first quote:", quoted[0].get("quote"))
@@ -0,0 +1,28 @@
+import asyncio
+import os
+import time
+
+# SIM_SLEEP_SCALE multiplies the simulated waits in the workflows (oven
+# heartbeats, retry pauses, kitchen checks): 0 skips them, 0.1 runs them ten
+# times faster. Stand-in LLM latency (FAKE_LLM_*) is configured separately.
+
+
+def scale() -> float:
+    return float(os.getenv("SIM_SLEEP_SCALE", "1"))
+
+
+def set_scale(value: float):
+    """Set the scale for this process and any worker it starts afterwards."""
+    os.environ["SIM_SLEEP_SCALE"] = repr(float(value))
+
+
+def sleep(seconds: float):
+    """time.sleep for a simulated wait."""
+    delay = seconds * scale()
+    if delay > 0:
+        time.sleep(delay)
+
+
+async def asleep(seconds: float):
+    """asyncio.sleep for a simulated wait; still yields to the loop when skipped."""
+    await asyncio.sleep(max(0.0, seconds * scale()))
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class _AsyncCall:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+# Request coalescing
+
+class SingleFlight:
+    """Share one upstream call between identical concurrent requests.
+
+    The first caller for a key runs fn; anyone asking for the same key
+    while it is in flight waits for that result (or exception) instead of
+    calling upstream again. Nothing is kept once the call finishes, so
+    this only collapses herds; the response cache handles repeats.
+    Threads use do(), coroutines ado(); the two don't share flights. In
+    ado() the call runs as its own task, so any caller (the first one
+    included) can be cancelled without cancelling the others; the task is
+    only cancelled once nobody is waiting for it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, _Call] = {}
+        self._async_calls: Dict[Tuple[int, Any], _AsyncCall] = {}
+        self.upstream: Dict[str, int] = defaultdict(int)
+        self.coalesced: Dict[str, int] = defaultdict(int)
+
+    def do(self, key: Any, fn: Callable[[], Any], label: str = "default") -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.upstream[label] += 1
+            else:
+                self.coalesced[label] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: Any, fn: Callable[[], Awaitable[Any]], label: str = "default") -> Any:
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        call = self._async_calls.get(loop_key)
+        if call is None:
+            call = self._async_calls[loop_key] = _AsyncCall(loop.create_task(fn()))
+            call.task.add_done_callback(
+                lambda _: self._async_calls.get(loop_key) is call and self._async_calls.pop(loop_key))
+            self.upstream[label] += 1
+        else:
+            self.coalesced[label] += 1
+        call.waiters += 1
+        try:
+            # shield: a cancelled caller only stops waiting, the shared call goes on
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        sites = {}
+        for label in set(self.upstream) | set(self.coalesced):
+            total = self.upstream[label] + self.coalesced[label]
+            sites[label] = {
+                "upstream": self.upstream[label],
+                "coalesced": self.coalesced[label],
+                "coalesced_ratio": self.coalesced[label] / total if total else 0.0,
+            }
+        return {"in_flight": len(self._calls) + len(self._async_calls), "sites": sites}
@@ -0,0 +1,282 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+RESYNC_S = 60.0
+OUTBOX_LIMIT = 1000
+
+
+def flatten(snapshot: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """{"floor": {"waitlist": 12}} -> {"floor.waitlist": 12}"""
+    out: Dict[str, Any] = {}
+    for key, value in snapshot.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            out.update(flatten(value, path + "."))
+        else:
+            out[path] = value
+    return out
+
+
+def unflatten(fields: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for path, value in fields.items():
+        node = out
+        *parents, leaf = path.split(".")
+        for p in parents:
+            node = node.setdefault(p, {})
+        node[leaf] = value
+    return out
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":"), default=str).encode("utf-8")
+
+
+# Subscribers
+
+class Subscriber:
+    """One dashboard: the areas it watches, what it has last been sent, and its outbox.
+
+    Messages are compact JSON: {"a": area, "v": version} plus either
+    "f" (every field, on first sight and on resync) or "s" (changed
+    fields) and "d" (removed fields). Field names are dotted paths.
+    With a send callback the outbox only holds messages until the
+    publisher hands them to send(), in order and outside its lock.
+    """
+
+    def __init__(self, sub_id: int, areas: Optional[Set[str]], send: Optional[Callable[[bytes], None]]):
+        self.id = sub_id
+        self.areas = areas
+        self.send = send
+        self.last: Dict[str, Dict[str, Any]] = {}
+        self.synced_at: Dict[str, float] = {}
+        self.outbox: Deque[bytes] = deque(maxlen=OUTBOX_LIMIT)
+        self.dropped = 0
+        self.errors = 0       # send() calls that raised
+        self.sending = False  # a publisher is draining the outbox into send()
+
+    def wants(self, area: str) -> bool:
+        return self.areas is None or area in self.areas
+
+    def deliver(self, message: bytes):
+        if len(self.outbox) == self.outbox.maxlen:
+            # the oldest message is lost; resend every area in full from now on
+            self.dropped += 1
+            self.last.clear()
+        self.outbox.append(message)
+
+    def poll(self) -> List[bytes]:
+        """Everything queued since the last poll."""
+        out = []
+        while self.outbox:
+            out.append(self.outbox.popleft())
+        return out
+
+
+# Publisher
+
+class SnapshotPublisher:
+    """Fan-out of dinner snapshots that only sends what changed.
+
+    Subscribers that were last sent the same state of an area (the common
+    case: they all saw the previous publish) share one computed and encoded
+    delta. Each subscriber gets a full copy of an area the first time and
+    again every resync_s, so a dropped message heals on its own.
+    """
+
+    def __init__(self, resync_s: float = RESYNC_S):
+        self.resync_s = resync_s
+        self._subs: Dict[int, Subscriber] = {}
+        self._current: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._full: Dict[str, Tuple[int, bytes]] = {}  # area -> (version, full message)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.bytes_sent = 0
+        self.bytes_full = 0  # what sending full snapshots every time would have cost
+        self.messages = 0
+
+    def subscribe(self, areas: Optional[Iterable[str]] = None,
+                  send: Optional[Callable[[bytes], None]] = None) -> Subscriber:
+        """Watch areas (all when None); messages go to send() or the subscriber's outbox."""
+        with self._lock:
+            sub = Subscriber(next(self._ids), set(areas) if areas is not None else None, send)
+            self._subs[sub.id] = sub
+            return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            self._subs.pop(sub.id, None)
+            sub.outbox.clear()
+
+    def _full_message(self, area: str, version: int, fields: Dict[str, Any]) -> bytes:
+        """The area's full message, encoded once per version. Caller holds the lock."""
+        cached = self._full.get(area)
+        if cached is None or cached[0] != version:
+            cached = self._full[area] = (version, _encode({"a": area, "v": version, "f": fields}))
+        return cached[1]
+
+    def publish(self, area: str, snapshot: Dict[str, Any], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        callbacks = []
+        with self._lock:
+            targets = [s for s in self._subs.values() if s.wants(area)]
+            fields = flatten(snapshot)
+            previous = self._current.get(area)
+            if previous == fields:
+                fields = previous  # unchanged: keep sharing the object subscribers already hold
+            self._current[area] = fields
+            version = self._versions[area] = self._versions.get(area, 0) + (fields is not previous)
+            if not targets:
+                return
+            deltas: Dict[int, Optional[bytes]] = {}
+            for sub in targets:
+                last = sub.last.get(area)
+                if last is None or now - sub.synced_at.get(area, 0.0) >= self.resync_s:
+                    message = self._full_message(area, version, fields)
+                    sub.synced_at[area] = now
+                else:
+                    key = id(last)
+                    if key not in deltas:
+                        deltas[key] = self._delta(area, version, last, fields)
+                    message = deltas[key]
+                sub.last[area] = fields
+                if message is None:
+                    continue
+                sub.deliver(message)
+                self.messages += 1
+                self.bytes_sent += len(message)
+                if sub.send is not None and not sub.sending:
+                    sub.sending = True
+                    callbacks.append(sub)
+            self.bytes_full += len(self._full_message(area, version, fields)) * len(targets)
+        for sub in callbacks:
+            self._drain(sub)
+
+    def _drain(self, sub: Subscriber):
+        """Hand sub's queued messages to its send(), one at a time, without holding the lock.
+
+        Only one thread drains a subscriber at a time (sub.sending), so
+        messages reach it in the order they were queued; a send() that
+        raises loses that message, and the area is resent in full next time.
+        """
+        while True:
+            with self._lock:
+                if not sub.outbox:
+                    sub.sending = False
+                    return
+                message = sub.outbox.popleft()
+            try:
+                sub.send(message)
+            except Exception:
+                with self._lock:
+                    sub.errors += 1
+                    sub.last.pop(json.loads(message)["a"], None)
+
+    @staticmethod
+    def _delta(area: str, version: int, last: Dict[str, Any], fields: Dict[str, Any]) -> Optional[bytes]:
+        if last is fields:
+            return None
+        changed = {k: v for k, v in fields.items() if last.get(k, _MISSING) != v}
+        removed = [k for k in last if k not in fields]
+        if not changed and not removed:
+            return None
+        message: Dict[str, Any] = {"a": area, "v": version, "s": changed}
+        if removed:
+            message["d"] = removed
+        return _encode(message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subs),
+            "areas": len(self._current),
+            "messages": self.messages,
+            "bytes_sent": self.bytes_sent,
+            "bytes_full": self.bytes_full,
+            "saved_ratio": 1 - self.bytes_sent / self.bytes_full if self.bytes_full else 0.0,
+        }
+
+
+_MISSING = object()
+
+
+# Client side
+
+class DeltaClient:
+    """Rebuilds per-area snapshots from a subscriber's messages."""
+
+    def __init__(self):
+        self.fields: Dict[str, Dict[str, Any]] = {}
+        self.versions: Dict[str, int] = {}
+
+    def apply(self, message: bytes) -> str:
+        msg = json.loads(message)
+        area = msg["a"]
+        if "f" in msg:
+            self.fields[area] = msg["f"]
+        else:
+            current = self.fields.setdefault(area, {})
+            current.update(msg["s"])
+            for key in msg.get("d", ()):
+                current.pop(key, None)
+        self.versions[area] = msg["v"]
+        return area
+
+    def snapshot(self, area: str) -> Dict[str, Any]:
+        return unflatten(self.fields.get(area, {}))
+
+
+# dinner snapshots published from dinnersanpshot.summarize_status
+publisher = SnapshotPublisher()
+
+
+# running the main
+if __name__ == "__main__":
+    import random
+
+    # 300 areas polled 30 times; each poll only a check or two moves
+    rng = random.Random(0)
+    areas = [f"area-{i:03d}" for i in range(300)]
+    state = {a: {"service_area": a,
+                 "inventory": {"steak": "ok", "pasta": "ok", "lettuce": "ok"},
+                 "floor": {"open_tables": 6, "waitlist": 8},
+                 "delivery": {"drivers_on_duty": 5, "avg_eta_min": 25},
+                 "overall": "moderate"} for a in areas}
+    pub = SnapshotPublisher(resync_s=600)
+    tablets = [pub.subscribe(rng.sample(areas, 20)) for _ in range(50)]
+    wall = pub.subscribe()
+
+    client = DeltaClient()
+    publish_s = parse_s = 0.0
+    received = 0
+    for poll in range(30):
+        start = time.perf_counter()
+        for a in areas:
+            s = state[a]
+            if rng.random() < 0.3:
+                s["floor"]["waitlist"] = max(0, s["floor"]["waitlist"] + rng.randint(-2, 2))
+            if rng.random() < 0.1:
+                s["delivery"]["avg_eta_min"] += rng.randint(-3, 3)
+            pub.publish(a, s, now=poll * 15.0)
+        publish_s += time.perf_counter() - start
+        messages = wall.poll()
+        received += len(messages)
+        start = time.perf_counter()
+        for m in messages:
+            client.apply(m)
+        parse_s += time.perf_counter() - start
+    full_messages = [json.dumps(state[a]).encode() for a in areas] * 30
+    start = time.perf_counter()
+    for m in full_messages:
+        json.loads(m)
+    full_parse_ms = (time.perf_counter() - start) * 1000
+
+    assert all(client.snapshot(a) == state[a] for a in areas)
+    print(json.dumps(pub.stats(), indent=2))
+    print(f"publish: {publish_s * 1000:.0f} ms for {30 * len(areas)} snapshots")
+    print(f"all-areas client parse: {parse_s * 1000:.1f} ms for {received} messages "
+          f"vs {full_parse_ms:.1f} ms for full snapshots")
@@ -0,0 +1,352 @@
+import asyncio
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# categorical check values stored as small ints
+STOCK_LEVELS = {"ok": 0, "low": 1, "critical": 2}
+BUSYNESS = {"calm": 0, "normal": 1, "moderate": 1, "busy": 2, "very busy": 3}
+
+METRICS = ("waitlist", "open_tables", "drivers_on_duty", "avg_eta_min", "steak", "pasta", "lettuce", "overall")
+
+DEFAULT_PATH = ".snapshots"
+RESOLUTION_S = 60
+CAPACITY = 7 * 24 * 60  # one week of minutes
+MAX_AREAS = 512
+
+
+class StoreFull(ValueError):
+    """Every area column is taken; the store cannot track a new area."""
+
+
+def _unwrap(value: Any, key: str) -> Any:
+    # taskonep nests each check under its own name: {"floor": {"floor": {...}}}
+    if isinstance(value, dict) and set(value) == {key}:
+        return value[key]
+    return value
+
+
+def flatten(snapshot: Dict[str, Any]) -> Dict[str, float]:
+    """Metric values of a taskone, taskonep or dinnersanpshot result."""
+    out: Dict[str, float] = {}
+    floor = _unwrap(snapshot.get("floor") or {}, "floor")
+    delivery = _unwrap(snapshot.get("delivery") or {}, "delivery")
+    inventory = _unwrap(snapshot.get("inventory") or {}, "inventory")
+    for key in ("waitlist", "open_tables"):
+        if isinstance(floor.get(key), (int, float)):
+            out[key] = floor[key]
+    for key in ("drivers_on_duty", "avg_eta_min"):
+        if isinstance(delivery.get(key), (int, float)):
+            out[key] = delivery[key]
+    for key in ("steak", "pasta", "lettuce"):
+        if inventory.get(key) in STOCK_LEVELS:
+            out[key] = STOCK_LEVELS[inventory[key]]
+    overall = str(snapshot.get("overall") or "").lower()
+    if overall in BUSYNESS:
+        out["overall"] = BUSYNESS[overall]
+    return out
+
+
+# Columnar store
+
+class SnapshotStore:
+    """Snapshot history as one memory-mapped float32 array per metric.
+
+    Each array is a ring of `capacity` time slots of `resolution_s` seconds
+    by `max_areas` columns, so a week of minutes for 512 areas is ~20 MB per
+    metric, written sparsely. slots.i64 records which absolute slot each
+    ring row currently holds; rows from an older lap read as missing, as do
+    areas that reported nothing in a slot (NaN). The last snapshot in a slot
+    wins. Several processes can append to the same directory.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        resolution_s: int = RESOLUTION_S,
+        capacity: int = CAPACITY,
+        max_areas: int = MAX_AREAS,
+    ):
+        self.path = path
+        self._local_lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        with self._locked():
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            else:
+                meta = {"resolution_s": resolution_s, "capacity": capacity, "max_areas": max_areas,
+                        "metrics": list(METRICS)}
+                with open(meta_path, "w") as f:
+                    json.dump(meta, f)
+            self.resolution_s = meta["resolution_s"]
+            self.capacity = meta["capacity"]
+            self.max_areas = meta["max_areas"]
+            self.slots = self._open("slots.i64", np.int64, (self.capacity,))
+            self.columns = {m: self._open(f"{m}.f32", np.float32, (self.capacity, self.max_areas))
+                            for m in meta["metrics"]}
+        self._areas: Dict[str, int] = {}
+        self._names: List[str] = []
+        self.dropped: Dict[str, int] = {}  # snapshots record() let go, per area not stored
+        self._load_areas()
+
+    def _open(self, name: str, dtype, shape: Tuple[int, ...]) -> np.memmap:
+        file = os.path.join(self.path, name)
+        mode = "r+" if os.path.exists(file) else "w+"  # w+ leaves a sparse file
+        return np.memmap(file, dtype=dtype, mode=mode, shape=shape)
+
+    @contextmanager
+    def _locked(self):
+        with self._local_lock:
+            with open(os.path.join(self.path, ".lock"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    # Areas
+
+    def _load_areas(self):
+        file = os.path.join(self.path, "areas.json")
+        if os.path.exists(file):
+            with open(file) as f:
+                self._names = json.load(f)
+            self._areas = {name: i for i, name in enumerate(self._names)}
+
+    def area_index(self, area: str) -> int:
+        i = self._areas.get(area)
+        if i is not None:
+            return i
+        with self._locked():
+            self._load_areas()  # another process may have added it
+            if area not in self._areas:
+                if len(self._names) >= self.max_areas:
+                    raise StoreFull(f"snapshot store is full ({self.max_areas} areas)")
+                self._names.append(area)
+                self._areas[area] = len(self._names) - 1
+                tmp = os.path.join(self.path, "areas.json.tmp")
+                with open(tmp, "w") as f:
+                    json.dump(self._names, f)
+                os.replace(tmp, os.path.join(self.path, "areas.json"))
+            return self._areas[area]
+
+    @property
+    def areas(self) -> List[str]:
+        self._load_areas()
+        return list(self._names)
+
+    # Writes
+
+    def _claim_rows(self, slots: np.ndarray) -> np.ndarray:
+        """Ring rows for slots, cleared if they still hold an older lap. Caller holds the lock."""
+        rows = slots % self.capacity
+        stale = self.slots[rows] != slots
+        if stale.any():
+            for column in self.columns.values():
+                column[rows[stale], :] = np.nan
+            self.slots[rows[stale]] = slots[stale]
+        return rows
+
+    def append(self, area: str, snapshot: Dict[str, Any], ts: Optional[float] = None):
+        values = flatten(snapshot)
+        if not values:
+            return
+        col = self.area_index(area)
+        slot = np.array([int((time.time() if ts is None else ts) // self.resolution_s)])
+        with self._locked():
+            row = self._claim_rows(slot)[0]
+            for metric, value in values.items():
+                self.columns[metric][row, col] = value
+
+    def append_many(self, ts: Sequence[float], areas: Sequence[str], metrics: Dict[str, Sequence[float]]):
+        """Bulk load (backfills, log replays): parallel arrays of time, area and metric values."""
+        slots = (np.asarray(ts, dtype=np.float64) // self.resolution_s).astype(np.int64)
+        cols = np.array([self.area_index(a) for a in areas], dtype=np.int64)
+        with self._locked():
+            unique, inverse = np.unique(slots, return_inverse=True)
+            rows = self._claim_rows(unique)[inverse]
+            for metric, values in metrics.items():
+                self.columns[metric][rows, cols] = np.asarray(values, dtype=np.float32)
+
+    def ingest_jsonl(self, path: str) -> int:
+        """Load a JSON-lines log of {"ts", "service_area", ...snapshot} records."""
+        ts, areas, metrics = [], [], {m: [] for m in self.columns}
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                values = flatten(rec)
+                ts.append(rec["ts"])
+                areas.append(rec["service_area"])
+                for m in metrics:
+                    metrics[m].append(values.get(m, np.nan))
+        if ts:
+            self.append_many(ts, areas, metrics)
+        return len(ts)
+
+    def flush(self):
+        self.slots.flush()
+        for column in self.columns.values():
+            column.flush()
+
+    # Queries
+
+    def window(self, metric: str, hours: float, now: Optional[float] = None,
+               areas: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """(slot start times, area names, values[time, area]) for the last `hours`.
+
+        Every slot in the window gets a row, so gaps show up as NaN and
+        row offsets are proportional to time.
+        """
+        names = self.areas
+        now_slot = int((time.time() if now is None else now) // self.resolution_s)
+        n = max(1, min(self.capacity, math.ceil(hours * 3600 / self.resolution_s)))
+        wanted = np.arange(now_slot - n + 1, now_slot + 1, dtype=np.int64)
+        rows = wanted % self.capacity
+        if areas is None:
+            cols = np.arange(len(names))
+        else:
+            cols = np.array([self._areas[a] for a in areas], dtype=np.int64)
+            names = list(areas)
+        data = self.columns[metric][rows][:, cols]
+        data[self.slots[rows] != wanted] = np.nan
+        return wanted * self.resolution_s, names, data
+
+    def rolling_mean(self, metric: str, window_min: float, hours: float, now: Optional[float] = None,
+                     areas: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Mean over the trailing window_min at every slot of the last `hours`, ignoring gaps."""
+        k = max(1, int(window_min * 60 // self.resolution_s))
+        times, names, data = self.window(metric, hours + k * self.resolution_s / 3600, now, areas)
+        present = ~np.isnan(data)
+        sums = np.cumsum(np.where(present, data, 0.0), axis=0, dtype=np.float64)
+        counts = np.cumsum(present, axis=0)
+        sums = sums[k:] - sums[:-k]
+        counts = counts[k:] - counts[:-k]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        return times[k:], names, means
+
+    def rising_fastest(self, metric: str = "waitlist", hours: float = 1.0, top: int = 10,
+                       now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Areas whose metric grew fastest, as least-squares slope per hour."""
+        times, names, data = self.window(metric, hours, now)
+        if not names:
+            return []
+        t = ((times - times[0]) / 3600.0)[:, None]
+        present = ~np.isnan(data)
+        y = np.where(present, data, 0.0)
+        tt = np.where(present, t, 0.0)
+        n = present.sum(axis=0)
+        sum_t, sum_y = tt.sum(axis=0), y.sum(axis=0)
+        denom = n * (tt * tt).sum(axis=0) - sum_t ** 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = np.where((n >= 2) & (denom > 0), (n * (tt * y).sum(axis=0) - sum_t * sum_y) / denom, np.nan)
+        order = np.argsort(np.where(np.isnan(slope), -np.inf, -slope))[:top]
+        return [(names[i], float(slope[i])) for i in order if not np.isnan(slope[i])]
+
+    def percentiles(self, metric: str, hours: float, qs: Sequence[float] = (50, 90, 99),
+                    now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Per-area percentiles of metric over the last `hours`; areas with no data are left out."""
+        _, names, data = self.window(metric, hours, now)
+        if not names:
+            return {}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN areas
+            values = np.nanpercentile(data, qs, axis=0)
+        out = {}
+        for i, name in enumerate(names):
+            if not np.isnan(values[0, i]):
+                out[name] = {f"p{q:g}": float(values[j, i]) for j, q in enumerate(qs)}
+        return out
+
+
+_default: Optional[SnapshotStore] = None
+_default_lock = threading.Lock()
+
+
+def _enabled() -> bool:
+    return os.getenv("SNAPSHOT_STORE", "1") != "0"
+
+
+def default_store() -> Optional[SnapshotStore]:
+    """Process-wide store at SNAPSHOT_STORE_PATH, or None when SNAPSHOT_STORE=0."""
+    global _default
+    if not _enabled():
+        return None
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = SnapshotStore(os.getenv("SNAPSHOT_STORE_PATH", DEFAULT_PATH))
+    return _default
+
+
+def after_fork_in_child():
+    """A forked child must not inherit a lock held by another parent thread."""
+    global _default_lock
+    _default_lock = threading.Lock()
+    if _default is not None:
+        _default._local_lock = threading.Lock()
+
+
+def record(area: str, snapshot: Dict[str, Any]):
+    """Append a finished snapshot to the default store, if there is one.
+
+    A new area that no longer fits is dropped with a warning rather than
+    failing the snapshot that is being recorded.
+    """
+    store = default_store()
+    if store is None:
+        return
+    try:
+        store.append(area, snapshot)
+    except StoreFull as e:
+        n = store.dropped[area] = store.dropped.get(area, 0) + 1
+        if n == 1:
+            warnings.warn(f"not recording snapshots for {area!r}: {e}", RuntimeWarning, stacklevel=2)
+
+
+async def arecord(area: str, snapshot: Dict[str, Any]):
+    """record() on a worker thread, keeping its file lock and writes off the event loop."""
+    if _enabled():
+        await asyncio.to_thread(record, area, snapshot)
+
+
+# running the main
+if __name__ == "__main__":
+    import tempfile
+
+    # a synthetic week for 300 areas at 5-minute resolution, then the trend queries
+    rng = np.random.default_rng(0)
+    store = SnapshotStore(tempfile.mkdtemp(prefix="snapshots-"), resolution_s=300, capacity=7 * 24 * 12, max_areas=300)
+    now = time.time()
+    steps = np.arange(7 * 24 * 12)
+    areas = [f"area-{i:03d}" for i in range(300)]
+    ts = np.repeat(now - (steps[::-1] * 300), len(areas))
+    names = areas * len(steps)
+    hour = (ts % 86400) / 3600
+    trend = np.tile(rng.normal(0, 2, len(areas)), len(steps))
+    waitlist = np.clip(8 + 6 * np.sin((hour - 13) / 24 * 2 * np.pi) + trend * (hour % 24) / 24 + rng.normal(0, 2, ts.size), 0, None)
+
+    start = time.perf_counter()
+    store.append_many(ts, names, {"waitlist": np.round(waitlist), "avg_eta_min": rng.normal(28, 5, ts.size)})
+    print(f"Loaded {ts.size} snapshots in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    _, _, week = store.window("waitlist", 7 * 24, now)
+    rising = store.rising_fastest("waitlist", hours=6, top=5, now=now)
+    pct = store.percentiles("avg_eta_min", hours=24, now=now)
+    _, _, rolling = store.rolling_mean("waitlist", 60, hours=24, now=now)
+    print(f"Week view {week.shape}, rising, percentiles and rolling mean in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print("Waitlist rising fastest (per hour):", [(a, round(s, 2)) for a, s in rising])
+    print("area-000 ETA percentiles (24h):", pct["area-000"])
@@ -0,0 +1,175 @@
+import itertools
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
+
+RESULT_TTL_S = 300.0  # summaries nobody collected are dropped after this long
+
+
+# Background batching queue for LLM log summaries
+
+class SummaryQueue:
+    """Collects summary jobs and writes them with one LLM request per batch.
+
+    submit() returns immediately with an id; a daemon worker gathers up to
+    max_batch jobs (waiting at most max_wait_s for stragglers), hands them
+    to summarize_batch and stores the texts. Callers keep their templated
+    text until result() or the on_summary callback delivers the upgrade;
+    the callback is also called, with None, when the summary failed. Ids
+    carry the process id, so they stay unique across shard processes.
+    Finished summaries nobody collects expire after result_ttl_s. A dead
+    worker is restarted on the next submit() or flush(), and a forked child
+    starts with an empty queue and its own worker.
+    """
+
+    def __init__(
+        self,
+        summarize_batch: Callable[[List[Dict[str, Any]]], List[str]],
+        max_batch: int = 16,
+        max_wait_s: float = 0.5,
+        result_ttl_s: float = RESULT_TTL_S,
+    ):
+        self.summarize_batch = summarize_batch
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self.result_ttl_s = result_ttl_s
+        self._ids = itertools.count(1)
+        self._reset()
+        self.batches_sent = 0
+        self.jobs_summarized = 0
+        self.jobs_failed = 0
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset())
+
+    def _reset(self):
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._results: Dict[str, Optional[str]] = {}
+        self._done: Dict[str, threading.Event] = {}
+        self._callbacks: Dict[str, Callable[[str, Optional[str]], None]] = {}
+        self._finished: Deque[Tuple[float, str]] = deque()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="summary-queue", daemon=True)
+                self._worker.start()
+
+    def submit(self, job: Dict[str, Any],
+               on_summary: Optional[Callable[[str, Optional[str]], None]] = None) -> str:
+        """Queue a job and return its summary id without waiting."""
+        summary_id = f"sum-{os.getpid()}-{next(self._ids)}"
+        with self._lock:
+            self._done[summary_id] = threading.Event()
+            if on_summary:
+                self._callbacks[summary_id] = on_summary
+        self._ensure_worker()
+        self._jobs.put((summary_id, job))
+        return summary_id
+
+    def result(self, summary_id: str, timeout: Optional[float] = None) -> Optional[str]:
+        """LLM summary for summary_id, or None if it failed or is not ready in time.
+
+        A delivered summary is handed out once and then forgotten.
+        """
+        done = self._done.get(summary_id)
+        if done is None or not done.wait(timeout):
+            return None
+        with self._lock:
+            self._done.pop(summary_id, None)
+            return self._results.pop(summary_id, None)
+
+    def status(self, summary_id: str) -> Optional[str]:
+        """"pending", "ready" or "failed"; None once collected, expired or never issued."""
+        with self._lock:
+            done = self._done.get(summary_id)
+            if done is None:
+                return None
+            if not done.is_set():
+                return "pending"
+            return "failed" if self._results.get(summary_id) is None else "ready"
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted job has been summarized (or failed)."""
+        self._ensure_worker()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for done in list(self._done.values()):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not done.wait(remaining):
+                return False
+        return True
+
+    def _next_batch(self) -> List:
+        batch = [self._jobs.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._deliver(batch)
+            except BaseException as e:  # the worker must outlive any one batch
+                print(f"Summary queue: delivering a batch of {len(batch)} failed ({e!r})")
+            finally:
+                for summary_id, _ in batch:
+                    self._complete(summary_id, None)  # no-op for the ones already delivered
+                now = time.monotonic()
+                with self._lock:
+                    for summary_id, _ in batch:
+                        self._finished.append((now, summary_id))
+                    self._expire(now)
+
+    def _deliver(self, batch: List):
+        try:
+            texts = self.summarize_batch([job for _, job in batch])
+            self.batches_sent += 1
+        except BaseException as e:
+            print(f"Summary queue: batch of {len(batch)} failed, keeping templated text ({e!r})")
+            texts = []
+        if not isinstance(texts, list):
+            texts = []
+        for i, (summary_id, _) in enumerate(batch):
+            text = texts[i] if i < len(texts) else None
+            text = text.strip() or None if isinstance(text, str) else None
+            self._complete(summary_id, text)
+
+    def _complete(self, summary_id: str, text: Optional[str]):
+        """Store text (None when it failed), wake result() and call the job's callback, once."""
+        with self._lock:
+            done = self._done.get(summary_id)
+            if done is None or done.is_set():
+                return
+            if text is None:
+                self.jobs_failed += 1
+            else:
+                self.jobs_summarized += 1
+            self._results[summary_id] = text
+            callback = self._callbacks.pop(summary_id, None)
+            done.set()
+        if callback:
+            try:
+                callback(summary_id, text)
+            except Exception as e:
+                print(f"Summary queue: callback for {summary_id} failed ({e})")
+
+    def _expire(self, now: float):
+        """Drop finished summaries older than result_ttl_s (caller holds _lock)."""
+        while self._finished and now - self._finished[0][0] > self.result_ttl_s:
+            _, summary_id = self._finished.popleft()
+            self._done.pop(summary_id, None)
+            self._results.pop(summary_id, None)
+            self._callbacks.pop(summary_id, None)
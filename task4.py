@@ -2,6 +2,8 @@ import asyncio
 import random
 from typing import TypedDict
 
+import simtime
+
 # class
 class BakeResult(TypedDict):
     status: str
@@ -15,7 +17,7 @@ class BakeResult(TypedDict):
 async def bake_batch(data: dict) -> dict:
     stages = ["preheat", "load", "bake", "finish"]
     for stage in stages:
-        await asyncio.sleep(1)
+        await simtime.asleep(1)
         temp = random.randint(180, 240)
         print(f"Heartbeat: stage={stage}, core_temp={temp}")
         if temp < 200:
@@ -48,7 +50,7 @@ async def supervisor(data: dict) -> BakeResult:
                     "reason": str(e),
                     "attempts": attempt,
                 }
-            await asyncio.sleep(2)
+            await simtime.asleep(2)
             print("Retrying...")
 
 # Running the main
@@ -1,20 +1,8 @@
-import os
 import random
-import time
-from dotenv import load_dotenv
 from typing_extensions import TypedDict
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import tool
-from langgraph.graph import StateGraph, START, END
 from pprint import pprint
-
-# loading .env
-load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise SystemExit("ERROR: GOOGLE_API_KEY not found in .env")
-
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=api_key)
+import simtime
 
 #class
 class BakeState(TypedDict):
@@ -35,7 +23,7 @@ def bake_batch(item: str, target_temp_c: int, batch_size: int) -> dict:
     peak_temp = 0
 
     for stage in stages:
-        time.sleep(0.5)
+        simtime.sleep(0.5)
         core_temp = random.randint(target_temp_c-10, target_temp_c+5)
         peak_temp = max(peak_temp, core_temp)
         heartbeat_ok = random.choice([True]*8 + [False]*2)  # 20% chance of failure
@@ -69,7 +57,7 @@ def supervise_bake(item: str, target_temp_c: int, batch_size: int, max_retries:
             }
         else:
             print(f"Bake failed: {result['reason']}")
-            time.sleep(1)
+            simtime.sleep(1)
 
     return {
         "item": item,
@@ -84,6 +72,8 @@ def supervise_bake(item: str, target_temp_c: int, batch_size: int, max_retries:
 
 # graphical representation
 def build_supervisor_graph():
+    from langgraph.graph import StateGraph, START, END
+
     graph = StateGraph(BakeState)
     graph.add_node("bake_batch", bake_batch)
     graph.add_node("supervise_bake", supervise_bake)
@@ -1,6 +1,8 @@
 import asyncio
 from typing import TypedDict
 
+import simtime
+
 # class
 class DinnerSnapshot(TypedDict):
     inventory: dict
@@ -10,17 +12,17 @@ class DinnerSnapshot(TypedDict):
 
 # defining async tools
 async def check_inventory(service_area: str) -> dict:
-    await asyncio.sleep(1)
+    await simtime.asleep(1)
     return {"steak": "low", "pasta": "ok", "lettuce": "ok"}
 
 
 async def check_floor(service_area: str) -> dict:
-    await asyncio.sleep(1.5)
+    await simtime.asleep(1.5)
     return {"open_tables": 4, "waitlist": 12}
 
 
 async def check_delivery(service_area: str) -> dict:
-    await asyncio.sleep(1.2)
+    await simtime.asleep(1.2)
     return {"drivers_on_duty": 5, "avg_eta_min": 28}
 
 
@@ -1,20 +1,11 @@
 
-from dotenv import load_dotenv
-import os
 import json
 import asyncio
 from typing_extensions import TypedDict
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import tool
-from langchain_core.runnables import RunnableParallel
-
-# loading .env
-load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise SystemExit("ERROR: GOOGLE_API_KEY not found in .env")
-
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=api_key)
+import breaker
+import snapshotstore
+from llmclient import acomplete
 
 # class 
 class RestaurantState(TypedDict):
@@ -24,43 +15,52 @@ class RestaurantState(TypedDict):
     delivery: dict
     overall: str
 
-# defining tools 
+# defining tools (async, so ainvoke runs them on the event loop)
 @tool
-def check_inventory(service_area: str):
+async def check_inventory(service_area: str):
     """Check stock for key items: steak, pasta, lettuce"""
     inventory = {"steak": "low", "pasta": "ok", "lettuce": "ok"}
     return {"inventory": inventory}
 
 @tool
-def check_floor(service_area: str):
+async def check_floor(service_area: str):
     """Check open tables and waitlist length"""
     floor = {"open_tables": 4, "waitlist": 12}
     return {"floor": floor}
 
 @tool
-def check_delivery(service_area: str):
+async def check_delivery(service_area: str):
     """Check active drivers and average ETA"""
     delivery = {"drivers_on_duty": 5, "avg_eta_min": 28}
     return {"delivery": delivery}
 
-# parallel execution
-async def dinner_rush_snapshot(service_area: str):
-    parallel = RunnableParallel(
-        inventory=lambda _: check_inventory(service_area),
-        floor=lambda _: check_floor(service_area),
-        delivery=lambda _: check_delivery(service_area)
-    )
+TOOLS = {"inventory": check_inventory, "floor": check_floor, "delivery": check_delivery}
 
-    results = await parallel.ainvoke({})
-    
-    # Summary by using gemini
+# parallel execution
+async def overall_busyness(results: dict) -> str:
+    """Summary by using gemini, with taskone's waitlist rule as fallback."""
     prompt = f"""
     Given the following restaurant status:
     {json.dumps(results, indent=2)}
     Return a single word for overall busyness: calm, moderate, busy, very busy.
     """
-    overall = llm.invoke(prompt).content.strip() or "busy"
-    results["overall"] = overall
+    waitlist = results.get("floor", {}).get("floor", {}).get("waitlist", 0)
+
+    async def ask_llm():
+        return await acomplete(prompt, site="busyness") or "busy"
+
+    return await breaker.aguard(
+        "busyness", ask_llm,
+        lambda: "busy" if waitlist > 10 else "normal",  # taskone's rule
+    )
+
+async def dinner_rush_snapshot(service_area: str):
+    # the tools are async, so ainvoke awaits them on the event loop: no
+    # executor hop per check
+    answers = await asyncio.gather(*(t.ainvoke(service_area) for t in TOOLS.values()))
+    results = dict(zip(TOOLS, answers))
+    results["overall"] = await overall_busyness(results)
+    await snapshotstore.arecord(service_area, results)
     return results
 
 # graphical nodes
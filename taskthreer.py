@@ -1,18 +1,7 @@
-from dotenv import load_dotenv
-import os
 import json
 from typing_extensions import TypedDict
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import tool
-from langgraph.graph import StateGraph, START, END
-
-# loading .env
-load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise SystemExit("ERROR: GOOGLE_API_KEY not found in .env")
-
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=api_key)
+from menucatalog import prep_eta
 
 # class
 class OrderState(TypedDict):
@@ -31,7 +20,7 @@ def dine_in(order_type: str, items: list):
     """Handle dine-in orders"""
     return {
         "route": "dine_in",
-        "prep_eta_min": 10,
+        "prep_eta_min": prep_eta(items, "dine_in").minutes,
         "courier_eta_min": 0,
         "notes": f"Table assigned, notify host for {len(items)} items"
     }
@@ -41,7 +30,7 @@ def takeout(order_type: str, items: list):
     """Handle takeout orders"""
     return {
         "route": "takeout",
-        "prep_eta_min": 15,
+        "prep_eta_min": prep_eta(items, "takeout").minutes,
         "courier_eta_min": 0,
         "notes": "Print pickup label"
     }
@@ -51,7 +40,7 @@ def delivery(order_type: str, items: list, address: str):
     """Handle delivery orders"""
     return {
         "route": "delivery",
-        "prep_eta_min": 18,
+        "prep_eta_min": prep_eta(items, "delivery").minutes,
         "courier_eta_min": 22,
         "notes": f"Assigned to driver for delivery to {address}"
     }
@@ -85,6 +74,8 @@ def route_order(input_data: dict) -> dict:
 
 # graphical part
 def build_router_graph():
+    from langgraph.graph import StateGraph, START, END
+
     graph = StateGraph(OrderState)
     graph.add_node("dine_in", dine_in)
     graph.add_node("takeout", takeout)
@@ -1,18 +1,6 @@
-from dotenv import load_dotenv
-import os
 import json
 from typing_extensions import TypedDict
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import tool
-from langgraph.graph import StateGraph, START, END
-
-# loading .env
-load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise SystemExit("ERROR: GOOGLE_API_KEY not found in .env")
-
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=api_key)
 
 #class
 class CateringState(TypedDict):
@@ -79,7 +67,10 @@ def finalize(status: str, quote: dict, reason: str):
 
 
 # sequential workflow
-def run_catering_orchestrator_manual(input_data: dict):
+def run_catering_orchestrator_manual(input_data: dict, trusted: bool = False):
+    if trusted:
+        return trusted_pipeline()(input_data)
+
     # Step 1: Capture the request
     state = capture_request.invoke(input={
         "event_date": input_data["event_date"],
@@ -122,8 +113,48 @@ def run_catering_orchestrator_manual(input_data: dict):
 
     return state
 
+# trusted direct execution: each step's tool and the state keys it reads, in order
+PIPELINE = [
+    (capture_request, ("event_date", "headcount", "menu")),
+    (check_capacity, ("capacity_ok", "headcount")),
+    (check_ingredients, ("ingredients_ok", "menu")),
+    (draft_quote, ("capacity_ok", "ingredients_ok", "headcount")),
+    (manager_gate, ("status", "reason", "quote")),
+    (finalize, ("status", "quote", "reason")),
+]
+_trusted = None
+
+def trusted_pipeline():
+    """Sequential workflow that calls the tools' functions directly.
+
+    The request is validated once against capture_request's schema and the
+    final state once against CateringState; the steps in between skip the
+    per-tool schema validation and callback setup of .invoke(). Built once
+    and reused. Gives the same result as the manual path.
+    """
+    global _trusted
+    if _trusted is None:
+        from pydantic import TypeAdapter
+
+        entry = capture_request.args_schema
+        exit_check = TypeAdapter(CateringState)
+        steps = [(t.func, keys) for t, keys in PIPELINE]
+
+        def run(input_data: dict) -> dict:
+            request = entry.model_validate(input_data)
+            state = {}
+            for fn, keys in steps:
+                source = state or request.__dict__
+                state.update(fn(*[source[k] for k in keys]))
+            return exit_check.validate_python(state)
+
+        _trusted = run
+    return _trusted
+
 # building the graph
 def build_catering_graph():
+    from langgraph.graph import StateGraph, START, END
+
     graph = StateGraph(CateringState)
     graph.add_node("capture_request", capture_request)
     graph.add_node("check_capacity", check_capacity)